@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'task', 'status', 'priority', 'run_at',
+                    'attempts', 'locked_by')
+    list_filter = ('status', 'task')
+    readonly_fields = ('last_error', 'locked_by', 'locked_at', 'created')
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        queryset.update(status=Job.QUEUED, attempts=0, locked_by='',
+                        locked_at=None, run_at=timezone.now())
+    retry.short_description = 'Перезапустить выбранные задачи'
+
+
+admin.site.register(Job, JobAdmin)
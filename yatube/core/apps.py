@@ -1,5 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db import configure_sqlite
+        from .warmup import warm_templates
+
+        connection_created.connect(configure_sqlite)
+        # регистрирует фоновые задачи из tasks.py всех приложений
+        autodiscover_modules('tasks')
+        if settings.TEMPLATE_WARMUP:
+            warm_templates(settings.DIR_TEMPLATE)
@@ -0,0 +1,153 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+# тело запроса больше этого уходит из памяти во временный файл
+MAX_MEMORY_BODY = 1024 * 1024
+
+
+def build_environ(scope, body):
+    """WSGI environ по ASGI scope (спецификация PEP 3333)."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode(
+            'utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = f'{environ[name]}{separator}{value}'
+        environ[name] = value
+    return environ
+
+
+class WSGIResponder:
+    """Выполняет WSGI-приложение в потоке пула и шлет ответ в event loop.
+
+    Каждый кусок ответа отправляется через loop, а поток ждет отправки:
+    медленный клиент притормаживает генерацию, не раздувая память.
+    """
+
+    def __init__(self, loop, send):
+        self.loop = loop
+        self.send = send
+        self.status = None
+        self.headers = None
+        self.started = False
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info and self.started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        self.status = int(status.split(' ', 1)[0])
+        self.headers = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ]
+
+    def send_threadsafe(self, message):
+        asyncio.run_coroutine_threadsafe(
+            self.send(message), self.loop).result()
+
+    def send_start(self):
+        if not self.started:
+            self.started = True
+            self.send_threadsafe({
+                'type': 'http.response.start',
+                'status': self.status,
+                'headers': self.headers,
+            })
+
+    def __call__(self, application, environ):
+        response = application(environ, self.start_response)
+        try:
+            for chunk in response:
+                if chunk:
+                    self.send_start()
+                    self.send_threadsafe({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            # close() отправляет request_finished: Django закрывает
+            # соединение с БД этого потока
+            if hasattr(response, 'close'):
+                response.close()
+        self.send_start()
+        self.send_threadsafe({'type': 'http.response.body', 'body': b''})
+
+
+class ThreadPoolASGIHandler:
+    """ASGI-приложение поверх WSGI-приложения Django.
+
+    Соединения, чтение тела запроса и отправку ответа обслуживает event
+    loop ASGI-сервера, а синхронный Django с запросами к БД выполняется
+    в пуле из max_workers потоков. Медленные клиенты и keep-alive не
+    занимают потоки, а число одновременных обращений к БД ограничено
+    размером пула.
+    """
+
+    def __init__(self, application, max_workers):
+        self.application = application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип {scope["type"]}')
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                self.executor, WSGIResponder(loop, send),
+                self.application, build_environ(scope, body)
+            )
+        finally:
+            body.close()
+
+    async def read_body(self, receive):
+        body = SpooledTemporaryFile(max_size=MAX_MEMORY_BODY)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+        return body
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
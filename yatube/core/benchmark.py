@@ -0,0 +1,20 @@
+import statistics
+
+
+def percentile(values, fraction):
+    """Значение перцентиля по отсортированному списку."""
+    if not values:
+        return 0.0
+    index = min(int(len(values) * fraction), len(values) - 1)
+    return values[index]
+
+
+def summarize(timings):
+    """mean/p50/p95/p99 для списка замеров."""
+    timings = sorted(timings)
+    return {
+        'mean': statistics.mean(timings) if timings else 0.0,
+        'p50': percentile(timings, 0.50),
+        'p95': percentile(timings, 0.95),
+        'p99': percentile(timings, 0.99),
+    }
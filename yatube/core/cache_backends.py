@@ -0,0 +1,245 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Чаще этого не обновляем время доступа: чтение не должно писать в файл
+ACCESS_RESOLUTION = 10
+MISSING = object()
+STATS_TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS cache_stats_insert AFTER INSERT ON cache '
+    'BEGIN UPDATE cache_stats SET count = count + 1, '
+    'size = size + NEW.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_stats_delete AFTER DELETE ON cache '
+    'BEGIN UPDATE cache_stats SET count = count - 1, '
+    'size = size - OLD.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_stats_update '
+    'AFTER UPDATE OF size ON cache '
+    'BEGIN UPDATE cache_stats SET size = size - OLD.size + NEW.size; END',
+)
+
+
+class SQLiteCache(BaseCache):
+    """Общий для всех процессов кэш в файле SQLite.
+
+    В отличие от LocMemCache, у всех воркеров gunicorn один набор
+    данных, и сброс ключа виден всем сразу. Файл открывается в режиме
+    WAL с mmap, чтобы чтения не блокировались записью. Размер
+    ограничен MAX_ENTRIES и MAX_SIZE (байт), при переполнении
+    вытесняются давно не читанные записи (LRU).
+
+    CACHES = {'default': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': '/var/tmp/yatube_cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 10000, 'MAX_SIZE': 64 * 2 ** 20},
+    }}
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self.max_size = int(options.get('MAX_SIZE', 64 * 2 ** 20))
+        self.mmap_size = int(options.get('MMAP_SIZE', self.max_size))
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _connect(self):
+        directory = os.path.dirname(self.location)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(
+            self.location, timeout=5, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(f'PRAGMA mmap_size={self.mmap_size}')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+            'expires REAL, accessed REAL NOT NULL, size INTEGER NOT NULL)'
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+        # число и размер записей ведут триггеры в одной строке
+        # cache_stats: проверка лимитов на запись не сканирует таблицу.
+        # recursive_triggers нужен, чтобы INSERT OR REPLACE вызывал
+        # триггер удаления для заменяемой строки.
+        connection.execute('PRAGMA recursive_triggers=ON')
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache_stats ('
+                'id INTEGER PRIMARY KEY CHECK (id = 0), '
+                'count INTEGER NOT NULL, size INTEGER NOT NULL)'
+            )
+            connection.execute(
+                'INSERT OR IGNORE INTO cache_stats '
+                'SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM cache')
+            for trigger in STATS_TRIGGERS:
+                connection.execute(trigger)
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _load(self, key, row, now):
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            self.connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+            return MISSING
+        if now - accessed > ACCESS_RESOLUTION:
+            self.connection.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+        return pickle.loads(value)
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        row = self.connection.execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        value = self._load(key, row, time.time())
+        return default if value is MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        rows = self.connection.execute(
+            'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({", ".join("?" * len(keys))})',
+            list(keys)
+        ).fetchall()
+        result = {}
+        for key, *row in rows:
+            value = self._load(key, row, now)
+            if value is not MISSING:
+                result[keys[key]] = value
+        return result
+
+    def _write(self, sql, key, value, timeout):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self.get_backend_timeout(timeout)
+        cursor = self.connection.execute(
+            sql, (key, data, expires, time.time(), len(data)))
+        self._cull()
+        return cursor.rowcount > 0
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)',
+            self._key(key, version), value, timeout
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self.connection.execute(
+            'DELETE FROM cache WHERE key = ? AND expires <= ?',
+            (key, time.time())
+        )
+        return self._write(
+            'INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?, ?)',
+            key, value, timeout
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self.connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ?',
+            (self.get_backend_timeout(timeout), self._key(key, version))
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        # BEGIN IMMEDIATE: чтение и запись атомарны между процессами
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            value = self.get(key, MISSING, version=version)
+            if value is MISSING:
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (data, len(data), self._key(key, version))
+            )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return value
+
+    def delete(self, key, version=None):
+        self.connection.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),))
+
+    def has_key(self, key, version=None):
+        row = self.connection.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time())
+        ).fetchone()
+        return row is not None
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache')
+
+    def _stats(self):
+        return self.connection.execute(
+            'SELECT count, size FROM cache_stats').fetchone()
+
+    def _cull(self):
+        count, size = self._stats()
+        if count <= self._max_entries and size <= self.max_size:
+            return
+        self.connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count, size = self._stats()
+        if count <= self._max_entries and size <= self.max_size:
+            return
+        if self._cull_frequency == 0:
+            self.clear()
+            return
+        # вытесняем давно не читанные записи, пока не уложимся в лимиты
+        excess = max(count - self._max_entries, 0)
+        cull = max(count // self._cull_frequency, excess)
+        self.connection.execute(
+            'DELETE FROM cache WHERE key IN ('
+            'SELECT key FROM cache ORDER BY accessed LIMIT ?)', (cull,))
+        if size > self.max_size:
+            self._cull_size()
+
+    def _cull_size(self):
+        total = 0
+        rows = self.connection.execute(
+            'SELECT accessed, size FROM cache ORDER BY accessed DESC')
+        for accessed, size in rows:
+            total += size
+            if total > self.max_size:
+                self.connection.execute(
+                    'DELETE FROM cache WHERE accessed <= ?', (accessed,))
+                return
+
+    def close(self, **kwargs):
+        # соединение живет весь процесс: дешевле, чем открывать на запрос
+        pass
@@ -0,0 +1,52 @@
+import datetime
+import time
+
+# имя переменной шаблона -> (функция без аргументов, TTL в секундах)
+PROVIDERS = {}
+# имя -> момент устаревания значения по time.monotonic()
+_expires = {}
+_context = {}
+# ближайший из _expires: до него словарь отдается без проверок
+_next_refresh = 0
+
+
+def global_value(name, ttl):
+    """Регистрирует редко меняющееся значение для всех шаблонов.
+
+    Функция вызывается не чаще раза в ttl секунд на процесс, а между
+    вызовами значение отдается из памяти.
+    """
+    def decorator(func):
+        PROVIDERS[name] = (func, ttl)
+        _expires.pop(name, None)
+        global _next_refresh
+        _next_refresh = 0
+        return func
+    return decorator
+
+
+def refresh(now):
+    """Пересчитывает устаревшие значения; возвращает новый словарь."""
+    global _context, _next_refresh
+    context = dict(_context)
+    for name, (func, ttl) in PROVIDERS.items():
+        if _expires.get(name, 0) <= now:
+            context[name] = func()
+            _expires[name] = now + ttl
+    # словарь заменяется целиком: другие потоки видят либо старый,
+    # либо готовый новый
+    _context = context
+    _next_refresh = min(_expires.values(), default=float('inf'))
+    return context
+
+
+def global_context(request):
+    now = time.monotonic()
+    if now >= _next_refresh:
+        return refresh(now)
+    return _context
+
+
+@global_value('year', ttl=60)
+def year():
+    return datetime.datetime.now().year
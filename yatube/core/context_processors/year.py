@@ -1,8 +0,0 @@
-import datetime
-
-
-def year(request):
-    year = datetime.datetime.now().year
-    return {
-        'year': year
-    }
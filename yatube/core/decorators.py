@@ -0,0 +1,9 @@
+def query_budget(max_queries):
+    """Объявляет для view допустимое число SQL-запросов.
+
+    Проверяется в core.middleware.QueryStatsMiddleware.
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# имя задачи -> Task; заполняется декоратором @task при импорте
+# модулей tasks.py приложений (см. CoreConfig.ready)
+registry = {}
+# столько кандидатов перебирает исполнитель, если первых уже разобрали
+CLAIM_CANDIDATES = 10
+
+
+class Task:
+    def __init__(self, func, name, priority, max_attempts, retry_delay):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def enqueue(self, *args, **options):
+        return enqueue(self.name, *args, **options)
+
+
+def task(name, priority=0, max_attempts=3, retry_delay=30):
+    """Регистрирует функцию как фоновую задачу под именем name.
+
+    Аргументы задачи сохраняются в JSON, поэтому передавать нужно id и
+    строки, а не модели. retry_delay — пауза перед первым повтором,
+    дальше она удваивается.
+    """
+    def decorator(func):
+        registry[name] = Task(func, name, priority, max_attempts,
+                              retry_delay)
+        return registry[name]
+    return decorator
+
+
+def enqueue(name, *args, key='', delay=None, priority=None):
+    """Ставит задачу в очередь; возвращает Job или None.
+
+    Строка очереди пишется в текущей транзакции, поэтому задача
+    появится для исполнителя вместе с данными, ради которых поставлена,
+    и пропадет при откате. С JOBS_IMMEDIATE задачи без задержки
+    выполняются сразу, как в тестах. Задача с ключом, который уже ждет
+    в очереди, не ставится: это проверяет уникальное ограничение Job.
+    """
+    task = registry[name]
+    if key and Job.objects.filter(key=key, status=Job.QUEUED).exists():
+        return None
+    if settings.JOBS_IMMEDIATE and not delay:
+        task(*args)
+        return None
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                task=name,
+                args=json.dumps(args),
+                key=key,
+                priority=task.priority if priority is None else priority,
+                max_attempts=task.max_attempts,
+                run_at=timezone.now() + timedelta(seconds=delay or 0),
+            )
+    except IntegrityError:
+        # такую же задачу поставили между проверкой и вставкой
+        return None
+
+
+class Worker:
+    """Выбирает и выполняет задачи; несколько процессов делят очередь.
+
+    Задача захватывается условным UPDATE по статусу: из нескольких
+    исполнителей его выполнит только один, блокировки строк не нужны.
+    """
+
+    def __init__(self, name=None):
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+
+    def claim(self):
+        now = timezone.now()
+        candidates = Job.objects.filter(
+            status=Job.QUEUED, run_at__lte=now).order_by(
+            '-priority', 'run_at', 'pk').values_list(
+            'pk', flat=True)[:CLAIM_CANDIDATES]
+        for pk in candidates:
+            claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+                status=Job.RUNNING, locked_by=self.name, locked_at=now,
+                attempts=F('attempts') + 1
+            )
+            if claimed:
+                return Job.objects.get(pk=pk)
+        return None
+
+    def run_job(self, job):
+        task = registry.get(job.task)
+        try:
+            if task is None:
+                raise LookupError(f'Неизвестная задача {job.task}')
+            task(*json.loads(job.args))
+        except Exception:
+            logger.exception('Задача %s завершилась ошибкой', job)
+            self.fail(job, task, traceback.format_exc())
+        else:
+            job.delete()
+
+    def fail(self, job, task, error):
+        job.last_error = error
+        job.locked_by = ''
+        job.locked_at = None
+        if task is None or job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.QUEUED
+            delay = task.retry_delay * 2 ** (job.attempts - 1)
+            job.run_at = timezone.now() + timedelta(seconds=delay)
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            # пока задача выполнялась, такую же поставили заново
+            job.delete()
+
+    def requeue_stale(self):
+        """Возвращает в очередь задачи упавших исполнителей.
+
+        Задача, исчерпавшая попытки, могла сама уронить исполнителя
+        (например, нехваткой памяти на картинке) и помечается ошибкой,
+        а не повторяется бесконечно. Возвращает число задач,
+        вернувшихся в очередь.
+        """
+        deadline = timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT)
+        stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=deadline)
+        stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, locked_by='', locked_at=None,
+            last_error=f'Не завершилась за JOBS_TIMEOUT '
+                       f'({settings.JOBS_TIMEOUT} с)'
+        )
+        requeued = 0
+        for pk in stale.values_list('pk', flat=True):
+            job = Job.objects.filter(pk=pk, status=Job.RUNNING)
+            try:
+                with transaction.atomic():
+                    requeued += job.update(
+                        status=Job.QUEUED, locked_by='', locked_at=None)
+            except IntegrityError:
+                # в очереди уже ждет такая же задача
+                job.delete()
+        return requeued
+
+    def run(self, burst=False, max_jobs=None):
+        """Выполняет задачи; с burst выходит, когда очередь пуста."""
+        done = 0
+        self.requeue_stale()
+        while max_jobs is None or done < max_jobs:
+            job = self.claim()
+            if job is None:
+                if burst:
+                    break
+                time.sleep(settings.JOBS_POLL_INTERVAL)
+                self.requeue_stale()
+                continue
+            self.run_job(job)
+            done += 1
+        return done
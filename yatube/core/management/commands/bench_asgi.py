@@ -0,0 +1,95 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import ThreadPoolASGIHandler, build_environ
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность WSGI-пула потоков и '
+            'yatube/asgi.py при медленных клиентах')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument(
+            '--connections', type=int, default=100,
+            help='одновременных клиентов'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='потоков у обоих вариантов'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='сетевая задержка клиента на прием и на отдачу, секунд'
+        )
+
+    def scope(self, path):
+        return {
+            'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': b'', 'headers': [(b'host', b'localhost')],
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+        }
+
+    def run_wsgi(self, application, options):
+        """Синхронный сервер: поток занят клиентом от приема до отдачи."""
+        delay = options['client_delay']
+        scope = self.scope(options['path'])
+
+        def handle(_):
+            time.sleep(delay)
+            response = application(
+                build_environ(scope, io.BytesIO()), lambda *args: None)
+            b''.join(response)
+            response.close()
+            time.sleep(delay)
+
+        with ThreadPoolExecutor(options['threads']) as executor:
+            list(executor.map(handle, range(options['requests'])))
+
+    def run_asgi(self, application, options):
+        delay = options['client_delay']
+        scope = self.scope(options['path'])
+
+        async def request(limit):
+            async with limit:
+                async def receive():
+                    await asyncio.sleep(delay)
+                    return {'type': 'http.request', 'body': b''}
+
+                async def send(message):
+                    if (message['type'] == 'http.response.body'
+                            and not message.get('more_body')):
+                        await asyncio.sleep(delay)
+
+                await application(scope, receive, send)
+
+        async def main():
+            limit = asyncio.Semaphore(options['connections'])
+            await asyncio.gather(
+                *(request(limit) for _ in range(options['requests'])))
+
+        asyncio.run(main())
+
+    def handle(self, *args, **options):
+        wsgi = get_wsgi_application()
+        asgi = ThreadPoolASGIHandler(wsgi, options['threads'])
+        # прогрев: первые запросы открывают БД и компилируют шаблоны
+        self.run_wsgi(wsgi, dict(options, requests=options['threads']))
+        for name, run, application in (
+            ('wsgi', self.run_wsgi, wsgi),
+            ('asgi', self.run_asgi, asgi),
+        ):
+            start = time.perf_counter()
+            run(application, options)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{name}: {options["requests"] / elapsed:.1f} req/s '
+                f'({options["requests"]} запросов за {elapsed:.2f} с, '
+                f'потоков {options["threads"]})'
+            )
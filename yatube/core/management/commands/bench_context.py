@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+
+from core.benchmark import summarize
+
+
+class Command(BaseCommand):
+    help = 'Время контекст-процессоров шаблонов на один запрос'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        paths = settings.TEMPLATES[0]['OPTIONS']['context_processors']
+        processors = [(path, import_string(path)) for path in paths]
+        totals = []
+        per_processor = {path: [] for path in paths}
+        for _ in range(options['requests']):
+            total = 0
+            for path, processor in processors:
+                start = time.perf_counter()
+                processor(request)
+                elapsed = (time.perf_counter() - start) * 10 ** 6
+                per_processor[path].append(elapsed)
+                total += elapsed
+            totals.append(total)
+        for path, timings in per_processor.items():
+            result = summarize(timings)
+            self.stdout.write(f'{path:60} mean={result["mean"]:.2f}us '
+                              f'p99={result["p99"]:.2f}us')
+        result = summarize(totals)
+        self.stdout.write(
+            f'{"всего на запрос":60} mean={result["mean"]:.2f}us '
+            f'p99={result["p99"]:.2f}us'
+        )
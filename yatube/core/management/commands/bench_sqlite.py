@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.benchmark import summarize
+
+# настройки SQLite по умолчанию: журнал отката и полная синхронизация
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'delete',
+    'synchronous': 'full',
+    'busy_timeout': 5000,
+}
+
+
+def connect(path, pragmas):
+    db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    for name, value in pragmas.items():
+        db.execute(f'PRAGMA {name} = {value}')
+    return db
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает SQLite с настройками по умолчанию и SQLITE_PRAGMAS: '
+            'чтение при параллельной записи и стоимость нового соединения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--connects', type=int, default=500)
+
+    def prepare(self, path, pragmas, rows):
+        db = connect(path, pragmas)
+        db.execute('CREATE TABLE post (id INTEGER PRIMARY KEY, '
+                   'author INTEGER, text TEXT)')
+        db.execute('CREATE INDEX post_author ON post (author)')
+        db.execute('BEGIN')
+        db.executemany(
+            'INSERT INTO post (author, text) VALUES (?, ?)',
+            ((i % 100, 'x' * 200) for i in range(rows))
+        )
+        db.execute('COMMIT')
+        db.close()
+
+    def concurrency(self, path, pragmas, options):
+        """Операций в секунду у читателей и писателей за options.seconds."""
+        stop = threading.Event()
+        counts = {'reads': 0, 'writes': 0, 'busy': 0}
+        lock = threading.Lock()
+
+        def reader(number):
+            db = connect(path, pragmas)
+            done = 0
+            while not stop.is_set():
+                db.execute(
+                    'SELECT id, text FROM post WHERE author = ? '
+                    'ORDER BY id DESC LIMIT 10', (done % 100,)).fetchall()
+                done += 1
+            with lock:
+                counts['reads'] += done
+
+        def writer(number):
+            db = connect(path, pragmas)
+            done = busy = 0
+            while not stop.is_set():
+                try:
+                    db.execute('BEGIN IMMEDIATE')
+                    db.execute('INSERT INTO post (author, text) '
+                               'VALUES (?, ?)', (number, 'comment'))
+                    db.execute('COMMIT')
+                    done += 1
+                except sqlite3.OperationalError:
+                    busy += 1
+                    if db.in_transaction:
+                        db.execute('ROLLBACK')
+            with lock:
+                counts['writes'] += done
+                counts['busy'] += busy
+
+        threads = [threading.Thread(target=reader, args=(i,))
+                   for i in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(i,))
+                    for i in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return {key: value / options['seconds'] if key != 'busy' else value
+                for key, value in counts.items()}
+
+    def connect_cost(self, path, pragmas, count):
+        """Запрос с новым соединением и с постоянным, в микросекундах."""
+        query = 'SELECT id FROM post WHERE author = 1 LIMIT 10'
+        fresh = []
+        for _ in range(count):
+            start = time.perf_counter()
+            db = connect(path, pragmas)
+            db.execute(query).fetchall()
+            db.close()
+            fresh.append((time.perf_counter() - start) * 10 ** 6)
+        db = connect(path, pragmas)
+        persistent = []
+        for _ in range(count):
+            start = time.perf_counter()
+            db.execute(query).fetchall()
+            persistent.append((time.perf_counter() - start) * 10 ** 6)
+        db.close()
+        return summarize(fresh), summarize(persistent)
+
+    def handle(self, *args, **options):
+        profiles = {
+            'default': DEFAULT_PRAGMAS,
+            'tuned': settings.SQLITE_PRAGMAS,
+        }
+        for name, pragmas in profiles.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.prepare(path, pragmas, options['rows'])
+                result = self.concurrency(path, pragmas, options)
+                fresh, persistent = self.connect_cost(
+                    path, pragmas, options['connects'])
+            self.stdout.write(
+                f'{name:8} reads/s={result["reads"]:.0f} '
+                f'writes/s={result["writes"]:.0f} busy={result["busy"]} '
+                f'query+connect p50={fresh["p50"]:.0f}us '
+                f'query on open connection p50={persistent["p50"]:.0f}us'
+            )
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import RequestContext
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from core.benchmark import summarize
+from core.warmup import warm_templates
+from posts.models import Post
+from posts.utils import POST_NUM
+
+
+class Command(BaseCommand):
+    help = ('Время рендера главной страницы с обычным и кэширующим '
+            'загрузчиком шаблонов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=200)
+
+    def engine(self, cached):
+        loaders = settings.TEMPLATE_LOADERS
+        if cached:
+            loaders = [('django.template.loaders.cached.Loader', loaders)]
+        template = settings.TEMPLATES[0]
+        return DjangoTemplates({
+            'NAME': f'bench-{cached}',
+            'DIRS': template['DIRS'],
+            'APP_DIRS': False,
+            'OPTIONS': dict(template['OPTIONS'], loaders=loaders),
+        }).engine
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        page = Paginator(Post.objects.for_feed(), POST_NUM).page(1)
+        page.object_list = list(page.object_list)
+        context = {
+            'page_obj': page,
+            # нулевой TTL: фрагмент ленты рендерится каждый раз
+            'feed_cache': {'key': 'bench', 'timeout': 0},
+        }
+        for name, cached in (('uncached', False), ('cached', True)):
+            engine = self.engine(cached)
+            warmup_start = time.perf_counter()
+            compiled = warm_templates(settings.DIR_TEMPLATE, engine)
+            warmup = (time.perf_counter() - warmup_start) * 1000
+            timings = []
+            for _ in range(options['renders']):
+                start = time.perf_counter()
+                engine.get_template('posts/index.html').render(
+                    RequestContext(request, context))
+                timings.append((time.perf_counter() - start) * 1000)
+            result = summarize(timings)
+            self.stdout.write(
+                f'{name:8} render ms: mean={result["mean"]:.2f} '
+                f'p50={result["p50"]:.2f} p99={result["p99"]:.2f} '
+                f'(прогрев {compiled} шаблонов: {warmup:.0f} ms)'
+            )
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.benchmark import summarize
+from core.cache_backends import SQLiteCache
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает задержку попаданий в кэш: locmem и sqlite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument('--reads', type=int, default=20000)
+        parser.add_argument(
+            '--value-size', type=int, default=4096,
+            help='размер значения в байтах (фрагмент ленты)'
+        )
+
+    def measure(self, cache, keys, reads, value):
+        for i in range(keys):
+            cache.set(f'key:{i}', value, None)
+        timings = []
+        for i in range(reads):
+            key = f'key:{i % keys}'
+            start = time.perf_counter()
+            cache.get(key)
+            timings.append((time.perf_counter() - start) * 10 ** 6)
+        return summarize(timings)
+
+    def handle(self, *args, **options):
+        value = 'x' * options['value_size']
+        with tempfile.TemporaryDirectory() as directory:
+            backends = {
+                'locmem': LocMemCache(
+                    'benchmark', {'OPTIONS': {'MAX_ENTRIES': 10 ** 6}}),
+                'sqlite': SQLiteCache(
+                    os.path.join(directory, 'cache.sqlite3'),
+                    {'OPTIONS': {'MAX_ENTRIES': 10 ** 6}}),
+            }
+            for name, cache in backends.items():
+                result = self.measure(
+                    cache, options['keys'], options['reads'], value)
+                self.stdout.write(
+                    f'{name:8} hit latency, us: '
+                    f'mean={result["mean"]:.1f} '
+                    f'p50={result["p50"]:.1f} p99={result["p99"]:.1f}'
+                )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из очереди; для параллельной '
+            'работы запускается в нескольких процессах')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='выйти, когда очередь опустеет'
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=None,
+            help='выйти после стольких задач'
+        )
+        parser.add_argument('--name', help='имя исполнителя в Job.locked_by')
+
+    def handle(self, *args, **options):
+        worker = Worker(options['name'])
+        done = worker.run(options['burst'], options['max_jobs'])
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
@@ -0,0 +1,92 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core.queries')
+
+# команды точек сохранения не считаются запросами: TestCase превращает
+# каждый atomic() в SAVEPOINT/RELEASE, и бюджет, проверенный в тестах,
+# расходился бы с production, где внешний atomic() их не шлет
+SAVEPOINT_SQL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    """Execute-wrapper, собирающий число и время SQL-запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.startswith(SAVEPOINT_SQL):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            if duration >= self.slowest_duration:
+                self.slowest_duration = duration
+                self.slowest_sql = sql
+
+
+class QueryStatsMiddleware:
+    """Считает запросы к БД на каждый view и сверяет их с бюджетом.
+
+    Статистика уходит в заголовок Server-Timing и в лог core.queries.
+    Бюджет задается декоратором core.decorators.query_budget или
+    словарем QUERY_BUDGETS в настройках; при QUERY_BUDGET_STRICT
+    превышение бюджета поднимает QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        response['Server-Timing'] = (
+            f'db;dur={stats.duration * 1000:.2f};'
+            f'desc="{stats.count} queries"'
+        )
+        logger.info(
+            'view=%s queries=%d sql_time_ms=%.2f slowest_ms=%.2f',
+            view_name, stats.count, stats.duration * 1000,
+            stats.slowest_duration * 1000,
+            extra={
+                'view': view_name,
+                'queries': stats.count,
+                'sql_time_ms': stats.duration * 1000,
+                'slowest_ms': stats.slowest_duration * 1000,
+                'slowest_sql': stats.slowest_sql,
+            }
+        )
+        budget = settings.QUERY_BUDGETS.get(
+            view_name, getattr(request, 'query_budget', None))
+        if budget is not None and stats.count > budget:
+            message = (f'{view_name}: {stats.count} queries, '
+                       f'budget {budget}; slowest: {stats.slowest_sql}')
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
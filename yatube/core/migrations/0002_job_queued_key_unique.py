@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:06
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_keys(apps, schema_editor):
+    Job = apps.get_model('core', 'Job')
+    queued = Job.objects.filter(status='queued').exclude(key='')
+    duplicates = queued.order_by().values('key').annotate(
+        total=Count('pk'), first=Min('pk')).filter(total__gt=1)
+    for duplicate in duplicates:
+        queued.filter(key=duplicate['key']).exclude(
+            pk=duplicate['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued'), models.Q(_negated=True, key='')), fields=('key',), name='job_queued_key_unique'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди; выполняет ее команда run_worker."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField('Задача', max_length=100)
+    args = models.TextField('Аргументы', default='[]')
+    # больше — раньше
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=3)
+    # непустой ключ не дает поставить в очередь вторую такую же задачу
+    key = models.CharField('Ключ', max_length=100, blank=True,
+                           db_index=True)
+    locked_by = models.CharField('Исполнитель', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        # порядок выборки исполнителем
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at'],
+                         name='job_queue_idx'),
+        ]
+        # дедупликацию по ключу держит база: проверка и вставка двух
+        # одновременных enqueue иначе могут пройти обе
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'], name='job_queued_key_unique',
+                condition=models.Q(status='queued') & ~models.Q(key='')),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,64 @@
+from functools import lru_cache
+
+from django import template
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+# (имя url, подпись, кому показывать, подсвечивать ли текущую страницу);
+# кому: None — всем, True — вошедшим, False — гостям
+NAV_ITEMS = (
+    ('about:author', 'Об авторе', None, True),
+    ('about:tech', 'Технологии', None, True),
+    ('posts:post_create', 'Новая запись', True, True),
+    ('users:password_change_form', 'Изменить пароль', True, True),
+    ('users:logout', 'Выйти', True, True),
+    ('users:login', 'Войти', False, False),
+    ('users:signup', 'Регистрация', False, False),
+)
+
+
+@lru_cache(maxsize=None)
+def nav_html(urlconf, prefix, authenticated, view_name):
+    """Пункты меню для пользователя и текущей страницы.
+
+    Вариантов немного — вход или гость на каждой из страниц, —
+    поэтому каждый собирается и реверсится один раз на процесс.
+    prefix и urlconf входят в ключ: от них зависят адреса.
+    """
+    items = []
+    for name, title, audience, highlight in NAV_ITEMS:
+        if audience is not None and audience != authenticated:
+            continue
+        if not highlight:
+            css = 'nav-link link-light'
+        elif name == view_name:
+            css = 'nav-link active'
+        else:
+            css = 'nav-link'
+        items.append((css, reverse(name, urlconf=urlconf), title))
+    return mark_safe(format_html_join(
+        '\n', '<li class="nav-item"><a class="{}" href="{}">{}</a></li>',
+        items
+    ))
+
+
+@register.simple_tag(takes_context=True)
+def nav_links(context):
+    request = context['request']
+    match = request.resolver_match
+    return nav_html(
+        get_urlconf(), get_script_prefix(),
+        request.user.is_authenticated,
+        match.view_name if match else None
+    )
+
+
+@register.simple_tag(takes_context=True)
+def nav_user(context):
+    user = context['request'].user
+    if not user.is_authenticated:
+        return ''
+    return format_html('<li>Пользователь: {}</li>', user.username)
@@ -0,0 +1,56 @@
+import asyncio
+
+from django.core.wsgi import get_wsgi_application
+from django.test import TestCase
+
+from core.asgi import ThreadPoolASGIHandler, build_environ
+
+
+class ASGIHandlerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.application = ThreadPoolASGIHandler(get_wsgi_application(), 1)
+
+    def request(self, path):
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver'),
+                        (b'accept', b'text/html'),
+                        (b'accept', b'*/*')],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.application(scope, receive, send))
+        return messages
+
+    def test_build_environ(self):
+        """Заголовки и путь переводятся в WSGI environ."""
+        environ = build_environ({
+            'method': 'GET', 'path': '/группа/', 'query_string': b'page=2',
+            'headers': [(b'content-type', b'text/plain'),
+                        (b'cookie', b'a=1'), (b'cookie', b'b=2')],
+        }, None)
+        self.assertEqual(environ['PATH_INFO'].encode('latin-1').decode(),
+                         '/группа/')
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+
+    def test_page_served(self):
+        """Страница Django отдается через ASGI целиком."""
+        # view выполняется в потоке пула со своим соединением к БД,
+        # которому не видна транзакция теста, поэтому страница без БД
+        messages = self.request('/about/author/')
+        self.assertEqual(messages[0]['type'], 'http.response.start')
+        self.assertEqual(messages[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        self.assertIn(b'</html>', body)
+        self.assertFalse(messages[-1].get('more_body'))
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache_backends import SQLiteCache
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_set_get_delete(self):
+        """Базовые операции кэша."""
+        self.cache.set('key', {'a': 1})
+        self.assertEqual(self.cache.get('key'), {'a': 1})
+        self.assertIsNone(self.cache.get('missing'))
+        self.cache.set('none', None)
+        self.assertTrue(self.cache.has_key('none'))
+        self.assertEqual(self.cache.get('none', 'default'), None)
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_and_incr(self):
+        """add не перезаписывает ключ, incr меняет значение на месте."""
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_get_many(self):
+        """get_many отдает только найденные ключи."""
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']),
+                         {'a': 1, 'b': 2})
+
+    def test_expiration(self):
+        """Просроченные записи не отдаются."""
+        self.cache.set('key', 'value', 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(self.cache.has_key('key'))
+
+    def test_shared_between_instances(self):
+        """Два экземпляра (воркера) видят одни и те же данные."""
+        other = self.make_cache()
+        self.cache.set('key', 'value')
+        self.assertEqual(other.get('key'), 'value')
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_lru_eviction_by_entries(self):
+        """При переполнении вытесняются давно не читанные записи."""
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for i in range(3):
+            cache.set(f'key{i}', i)
+        cache.connection.execute(
+            "UPDATE cache SET accessed = accessed - 100 "
+            "WHERE key LIKE '%key0'")
+        cache.set('key3', 3)
+        self.assertIsNone(cache.get('key0'))
+        self.assertEqual(cache.get('key3'), 3)
+
+    def test_size_cap(self):
+        """Суммарный размер значений не превышает MAX_SIZE."""
+        cache = self.make_cache(MAX_SIZE=10000)
+        for i in range(20):
+            cache.set(f'key{i}', 'x' * 1000)
+        size = cache.connection.execute(
+            'SELECT SUM(size) FROM cache').fetchone()[0]
+        self.assertLessEqual(size, 10000)
+        self.assertEqual(cache.get('key19'), 'x' * 1000)
+
+    def test_stats_follow_writes(self):
+        """Счетчики записей и размера совпадают с содержимым таблицы."""
+        self.cache.set('a', 'x' * 100)
+        self.cache.set('a', 'x' * 10)
+        self.cache.set_many({'b': 1, 'c': 2})
+        self.cache.add('counter', 9)
+        self.cache.incr('counter', 10 ** 20)
+        self.cache.delete('b')
+        actual = self.cache.connection.execute(
+            'SELECT COUNT(*), SUM(size) FROM cache').fetchone()
+        self.assertEqual(self.cache._stats(), actual)
+        self.assertEqual(self.make_cache()._stats(), actual)
@@ -0,0 +1,43 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.context_processors import globals as global_context
+
+
+class GlobalContextTest(TestCase):
+    def setUp(self):
+        self.calls = 0
+
+        def counter():
+            self.calls += 1
+            return self.calls
+
+        global_context.global_value('test_counter', ttl=60)(counter)
+
+    def tearDown(self):
+        global_context.PROVIDERS.pop('test_counter')
+        global_context._expires.pop('test_counter', None)
+        # иначе значение осталось бы в контексте всех следующих тестов
+        global_context._context.pop('test_counter', None)
+        global_context._next_refresh = 0
+
+    def test_year_in_footer(self):
+        """В подвале текущий год."""
+        response = self.client.get(reverse('about:author'))
+        self.assertContains(response, f'© {datetime.date.today().year}')
+
+    def test_value_memoized_until_ttl(self):
+        """Значение считается раз в TTL, а не на каждый запрос."""
+        with mock.patch('core.context_processors.globals.time.monotonic',
+                        return_value=1000):
+            for _ in range(3):
+                self.client.get(reverse('about:author'))
+                context = global_context.global_context(None)
+            self.assertEqual(context['test_counter'], 1)
+        with mock.patch('core.context_processors.globals.time.monotonic',
+                        return_value=1061):
+            context = global_context.global_context(None)
+        self.assertEqual(context['test_counter'], 2)
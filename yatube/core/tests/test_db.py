@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import connection
+from django.template.backends.django import DjangoTemplates
+from django.test import TestCase
+
+from core.warmup import warm_templates
+
+
+class SQLiteProfileTest(TestCase):
+    def test_pragmas_applied(self):
+        """Новое соединение получает PRAGMA из SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            # 1 — NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0],
+                             settings.SQLITE_PRAGMAS['busy_timeout'])
+
+
+class TemplateWarmupTest(TestCase):
+    def test_warmup_fills_cached_loader(self):
+        """Прогрев компилирует все шаблоны в кэш загрузчика."""
+        engine = DjangoTemplates({
+            'NAME': 'warmup',
+            'DIRS': [settings.DIR_TEMPLATE],
+            'APP_DIRS': False,
+            'OPTIONS': {'loaders': [(
+                'django.template.loaders.cached.Loader',
+                settings.TEMPLATE_LOADERS
+            )]},
+        }).engine
+        compiled = warm_templates(settings.DIR_TEMPLATE, engine)
+        self.assertGreater(compiled, 0)
+        loader = engine.template_loaders[0]
+        self.assertIn('posts/index.html', loader.get_template_cache)
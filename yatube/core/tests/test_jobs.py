@@ -0,0 +1,138 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.jobs import Worker, enqueue, registry, task
+from core.models import Job
+
+User = get_user_model()
+
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.broken', max_attempts=2, retry_delay=10)
+def broken():
+    raise ValueError('сломано')
+
+
+@override_settings(JOBS_IMMEDIATE=False)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker('test')
+
+    def test_immediate_mode(self):
+        """С JOBS_IMMEDIATE задача выполняется при постановке."""
+        with self.settings(JOBS_IMMEDIATE=True):
+            self.assertIsNone(enqueue('tests.record', 1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_priority_and_delay(self):
+        """Задачи берутся по приоритету, отложенные ждут своего времени."""
+        enqueue('tests.record', 'low', priority=-1)
+        enqueue('tests.record', 'high', priority=5)
+        enqueue('tests.record', 'later', delay=60)
+        enqueue('tests.record', 'normal')
+        self.assertEqual(self.worker.run(burst=True), 3)
+        self.assertEqual(calls, ['high', 'normal', 'low'])
+        self.assertEqual(
+            list(Job.objects.values_list('args', flat=True)), ['["later"]'])
+
+    def test_key_deduplicates(self):
+        """Задача с тем же ключом не ставится второй раз."""
+        self.assertIsNotNone(enqueue('tests.record', 1, key='one'))
+        self.assertIsNone(enqueue('tests.record', 2, key='one'))
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_key_unique_in_database(self):
+        """Ключ ждущей задачи уникален и при гонке двух enqueue."""
+        enqueue('tests.record', 1, key='one')
+        with mock.patch('django.db.models.QuerySet.exists',
+                        return_value=False):
+            self.assertIsNone(enqueue('tests.record', 2, key='one'))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(task='tests.record', key='one')
+        self.worker.claim()
+        self.assertIsNotNone(enqueue('tests.record', 3, key='one'))
+        self.assertEqual(Job.objects.filter(key='one').count(), 2)
+
+    def test_retries_then_fails(self):
+        """Упавшая задача повторяется с паузой, затем помечается ошибкой."""
+        job = registry['tests.broken'].enqueue()
+        with self.assertLogs('core.jobs', level='ERROR'):
+            self.worker.run(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('сломано', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', level='ERROR'):
+            self.worker.run(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_claim_is_exclusive(self):
+        """Задачу, взятую одним исполнителем, другой не получит."""
+        enqueue('tests.record', 1)
+        self.assertIsNotNone(self.worker.claim())
+        self.assertIsNone(Worker('other').claim())
+
+    def test_stale_job_requeued(self):
+        """Задача упавшего исполнителя возвращается в очередь."""
+        enqueue('tests.record', 1)
+        self.worker.claim()
+        Job.objects.update(locked_at=timezone.now() - timedelta(days=1))
+        call_command('run_worker', burst=True, stdout=StringIO())
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_stale_job_out_of_attempts_fails(self):
+        """Брошенная задача без оставшихся попыток не повторяется."""
+        enqueue('tests.record', 1)
+        self.worker.claim()
+        Job.objects.update(locked_at=timezone.now() - timedelta(days=1),
+                           attempts=F('max_attempts'))
+        self.assertEqual(self.worker.requeue_stale(), 0)
+        self.assertEqual(self.worker.run(burst=True), 0)
+        self.assertEqual(calls, [])
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('JOBS_TIMEOUT', job.last_error)
+
+    def test_stale_job_dropped_if_key_queued(self):
+        """Брошенная задача не дублирует такую же, ждущую в очереди."""
+        enqueue('tests.record', 1, key='one')
+        self.worker.claim()
+        Job.objects.update(locked_at=timezone.now() - timedelta(days=1))
+        enqueue('tests.record', 2, key='one')
+        self.assertEqual(self.worker.requeue_stale(), 0)
+        self.assertEqual(
+            list(Job.objects.values_list('args', 'status')),
+            [('[2]', Job.QUEUED)])
+
+    def test_password_reset_mail_is_queued(self):
+        """Письмо для сброса пароля отправляет исполнитель, а не view."""
+        User.objects.create_user(
+            username='user', email='user@example.com', password='password')
+        self.client.post(reverse('users:password_reset_form'),
+                         {'email': 'user@example.com'})
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertTrue(Job.objects.filter(task='users.send_email').exists())
+        self.worker.run(burst=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
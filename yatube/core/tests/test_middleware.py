@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware import QueryBudgetExceeded, QueryStats
+
+User = get_user_model()
+
+
+class QueryStatsMiddlewareTest(TestCase):
+    def test_server_timing_header(self):
+        """Ответ содержит заголовок Server-Timing со статистикой БД."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertRegex(
+            response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+
+    def test_stats_logged_per_view(self):
+        """Статистика пишется в лог с именем view."""
+        with self.assertLogs('core.queries', level='INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(logs.records[0].view, 'posts:index')
+        self.assertIn('queries', logs.records[0].__dict__)
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0},
+                       QUERY_BUDGET_STRICT=True)
+    def test_budget_exceeded_strict(self):
+        """В строгом режиме превышение бюджета роняет запрос."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('posts:index'))
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0},
+                       QUERY_BUDGET_STRICT=False)
+    def test_budget_exceeded_logged(self):
+        """Без строгого режима превышение бюджета пишется в лог."""
+        with self.assertLogs('core.queries', level='WARNING'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_savepoints_not_counted(self):
+        """Точки сохранения вокруг atomic() не расходуют бюджет."""
+        stats = QueryStats()
+        with connection.execute_wrapper(stats), transaction.atomic():
+            User.objects.exists()
+        self.assertEqual(stats.count, 1)
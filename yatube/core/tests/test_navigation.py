@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.templatetags.navigation import nav_html
+
+User = get_user_model()
+
+
+class NavigationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NavUser')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_guest_links(self):
+        """Гость видит вход и регистрацию, но не выход."""
+        response = self.client.get(reverse('about:author'))
+        self.assertContains(response, reverse('users:login'))
+        self.assertContains(response, reverse('users:signup'))
+        self.assertNotContains(response, reverse('users:logout'))
+        self.assertContains(
+            response,
+            f'class="nav-link active" href="{reverse("about:author")}"'
+        )
+
+    def test_user_links_and_active_page(self):
+        """Вошедшему подсвечивается текущая страница и виден его логин."""
+        url = reverse('posts:post_create')
+        response = self.authorized_client.get(url)
+        self.assertContains(response, f'class="nav-link active" href="{url}"')
+        self.assertContains(response, 'Пользователь: NavUser')
+        self.assertNotContains(response, reverse('users:signup'))
+
+    def test_menu_built_once(self):
+        """Меню для одной страницы и роли собирается один раз."""
+        nav_html.cache_clear()
+        for _ in range(3):
+            self.authorized_client.get(reverse('about:tech'))
+        info = nav_html.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
@@ -0,0 +1,29 @@
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def warm_templates(directory, engine=None):
+    """Компилирует все шаблоны из directory; возвращает их число.
+
+    С кэширующим загрузчиком скомпилированные шаблоны остаются в памяти
+    процесса, и первые запросы не тратят время на разбор файлов.
+    """
+    engine = engine or engines['django'].engine
+    compiled = 0
+    for root, _, files in os.walk(directory):
+        for file in sorted(files):
+            if not file.endswith('.html'):
+                continue
+            name = os.path.relpath(
+                os.path.join(root, file), directory).replace(os.sep, '/')
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                logger.warning('Шаблон %s не скомпилирован: %s', name, error)
+                continue
+            compiled += 1
+    return compiled
@@ -1,14 +1,38 @@
 from django.contrib import admin
 
 from .models import Post, Group
+from .purge import restore_posts, soft_delete_posts
+from .search import filter_posts
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group',
+                    'is_deleted')
     list_editable = ('group',)
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'is_deleted')
     empty_value_display = '-пусто-'
+    actions = ('soft_delete', 'restore')
+
+    def has_delete_permission(self, request, obj=None):
+        # строки с картинками и лентами удаляет purge_deleted порциями
+        return False
+
+    def soft_delete(self, request, queryset):
+        soft_delete_posts(queryset)
+    soft_delete.short_description = 'Удалить выбранные посты'
+
+    def restore(self, request, queryset):
+        restore_posts(queryset)
+    restore.short_description = 'Восстановить выбранные посты'
+
+    def get_search_results(self, request, queryset, search_term):
+        # полнотекстовый индекс вместо LIKE '%...%' по всей таблице
+        results = filter_posts(queryset, search_term)
+        if results is None:
+            return super().get_search_results(
+                request, queryset, search_term)
+        return results, False
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,194 @@
+import json
+from functools import wraps
+
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition
+
+from core.decorators import query_budget
+
+from .models import Comment, Group, Post, User
+from .utils import COMMENT_NUM, POST_NUM, get_cursor_page
+from .views import (group_etag, index_etag, post_detail_etag,
+                    profile_etag)
+
+MAX_LIMIT = 100
+MAX_IDS = 100
+
+# поле ответа -> поля модели, которые для него нужны в only()
+POST_FIELDS = {
+    'id': ('id',),
+    'text': ('text',),
+    'pub_date': ('pub_date',),
+    'author': ('author', 'author__username'),
+    'group': ('group', 'group__slug'),
+    'image': ('image',),
+}
+RELATED_FIELDS = {'author': 'author', 'group': 'group'}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def json_response(data, status=200):
+    # компактный вывод без пробелов и \u-экранирования кириллицы;
+    # даты приводятся к строкам заранее, без медленного default=
+    content = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return HttpResponse(
+        content, status=status, content_type='application/json')
+
+
+def api_view(view):
+    """Ошибки API отдаются JSON, а не HTML-страницами."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response(
+                {'error': 'Метод не поддерживается'}, status=405)
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return json_response({'error': 'Не найдено'}, status=404)
+        except ApiError as error:
+            return json_response({'error': str(error)}, status=error.status)
+    return wrapper
+
+
+def get_fields(request):
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(POST_FIELDS)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = set(fields) - set(POST_FIELDS)
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return fields
+
+
+def get_limit(request, default=POST_NUM):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def project(queryset, fields):
+    """Выбирает из БД только колонки запрошенных полей.
+
+    pub_date и id нужны курсору всегда, даже если их нет в ответе.
+    """
+    columns = {'id', 'pub_date'}
+    for field in fields:
+        columns.update(POST_FIELDS[field])
+    related = [RELATED_FIELDS[field] for field in fields
+               if field in RELATED_FIELDS]
+    return queryset.select_related(*related).only(*columns)
+
+
+def serialize_post(post, fields):
+    data = {}
+    for field in fields:
+        if field == 'author':
+            data['author'] = post.author.username
+        elif field == 'group':
+            data['group'] = post.group.slug if post.group_id else None
+        elif field == 'image':
+            data['image'] = post.image.url if post.image else None
+        elif field == 'pub_date':
+            data['pub_date'] = post.pub_date.isoformat()
+        else:
+            data[field] = getattr(post, field)
+    return data
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def feed_response(request, queryset):
+    fields = get_fields(request)
+    page = get_cursor_page(
+        request, project(queryset, fields), get_limit(request))
+    return json_response({
+        'results': [serialize_post(post, fields) for post in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def batch_response(request, ids):
+    """Посты по списку id одним запросом, в порядке запроса."""
+    try:
+        ids = [int(post_id) for post_id in ids.split(',') if post_id]
+    except ValueError:
+        raise ApiError('ids должен быть списком чисел через запятую')
+    if len(ids) > MAX_IDS:
+        raise ApiError(f'Не больше {MAX_IDS} id за запрос')
+    fields = get_fields(request)
+    posts = project(Post.objects.visible(), fields).in_bulk(ids)
+    return json_response({
+        'results': [serialize_post(posts[post_id], fields)
+                    for post_id in ids if post_id in posts],
+        'missing': [post_id for post_id in ids if post_id not in posts],
+    })
+
+
+@condition(etag_func=index_etag)
+@api_view
+@query_budget(3)
+def posts_list(request):
+    ids = request.GET.get('ids')
+    if ids is not None:
+        return batch_response(request, ids)
+    return feed_response(request, Post.objects.visible())
+
+
+@condition(etag_func=group_etag)
+@api_view
+@query_budget(4)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group.posts.visible())
+
+
+@condition(etag_func=profile_etag)
+@api_view
+@query_budget(4)
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username, is_active=True)
+    return feed_response(request, author.posts.visible())
+
+
+@api_view
+@query_budget(4)
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Нужна авторизация', status=401)
+    posts = Post.objects.visible().filter(feed_items__user=request.user)
+    return feed_response(request, posts)
+
+
+@condition(etag_func=post_detail_etag)
+@api_view
+@query_budget(4)
+def post_detail(request, post_id):
+    fields = get_fields(request)
+    post = get_object_or_404(
+        project(Post.objects.visible(), fields), pk=post_id)
+    comments = get_cursor_page(
+        request, Comment.objects.for_detail().filter(post_id=post.pk),
+        COMMENT_NUM, field='created'
+    )
+    data = serialize_post(post, fields)
+    data['comments'] = [serialize_comment(comment) for comment in comments]
+    data['comments_next'] = comments.next_cursor
+    return json_response(data)
@@ -0,0 +1,150 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+
+from .thumbnails import prefetch_thumbnails, recording_fallbacks
+
+VERSION_PREFIX = 'version'
+FRAGMENT_PREFIX = 'post_fragment'
+POST_TEMPLATE = 'posts/includes/post.html'
+
+
+def version_key(scope):
+    return f'{VERSION_PREFIX}:{scope}'
+
+
+def new_version():
+    # начальная версия от времени: если ключ версии вытеснят из кэша,
+    # новая не совпадет со старой и не оживит устаревшие фрагменты
+    return int(time.time() * 1000)
+
+
+def get_versions(*scopes):
+    keys = {version_key(scope): scope for scope in scopes}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, new_version(), None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_versions(*scopes):
+    for scope in set(scopes):
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_version(), None)
+
+
+def feed_cache_key(request, *scopes):
+    """Ключ фрагмента ленты: версии всех зависимостей и номер страницы.
+
+    Любое изменение поста поднимает версию, и новый ключ сразу
+    промахивается мимо устаревшего фрагмента, поэтому TTL может быть
+    долгим.
+    """
+    versions = get_versions(*scopes)
+    parts = [f'{scope}.{versions[scope]}' for scope in scopes]
+    if 'cursor' in request.GET:
+        parts.append(f'c.{request.GET["cursor"]}')
+    else:
+        parts.append(f'p.{request.GET.get("page", 1)}')
+    parts.append('auth' if request.user.is_authenticated else 'anon')
+    return ':'.join(parts)
+
+
+def feed_cache(request, *scopes):
+    return {
+        'key': feed_cache_key(request, *scopes),
+        'timeout': settings.FEED_CACHE_TIMEOUT,
+    }
+
+
+def post_scopes(post, group_id=None):
+    """Версии, которые зависят от содержимого поста."""
+    scopes = ['posts', f'post:{post.pk}', f'author:{post.author_id}']
+    for group in (post.group_id, group_id):
+        if group is not None:
+            scopes.append(f'group:{group}')
+    return scopes
+
+
+def versions_etag(request, *scopes):
+    """ETag страницы из версий ее данных, без запросов к БД.
+
+    Cookie сессии и CSRF входят в тег: от них зависят шапка, кнопки
+    и формы на странице.
+    """
+    versions = get_versions(*scopes)
+    parts = [f'{scope}.{versions[scope]}' for scope in scopes]
+    parts.append(request.get_full_path())
+    parts.append(request.COOKIES.get(settings.SESSION_COOKIE_NAME, ''))
+    parts.append(request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def card_scopes(post):
+    """Версии, от которых зависит карточка поста в лентах.
+
+    Кроме самого поста карточка выводит имя автора и slug группы: их
+    версии поднимаются при смене этих данных, а не каждым новым постом.
+    """
+    scopes = [f'post:{post.pk}', f'author_card:{post.author_id}']
+    if post.group_id is not None:
+        scopes.append(f'group_card:{post.group_id}')
+    return scopes
+
+
+def post_fragments(posts, group_link=False):
+    """HTML карточек постов: из кэша, недостающие рендерятся один раз.
+
+    Фрагмент хранится вместе с версиями card_scopes, с которыми был
+    отрендерен, поэтому версии и фрагменты всей страницы читаются
+    одним get_many; правка поста, автора или группы поднимает версию
+    и фрагмент перерисовывается.
+    """
+    posts = list(posts)
+    scopes = {post.pk: card_scopes(post) for post in posts}
+    fragment_keys = {
+        post.pk: f'{FRAGMENT_PREFIX}:{post.pk}:{int(group_link)}'
+        for post in posts
+    }
+    version_keys = {version_key(scope): scope
+                    for post_scopes in scopes.values()
+                    for scope in post_scopes}
+    cached = cache.get_many([*version_keys, *fragment_keys.values()])
+    unversioned = [scope for key, scope in version_keys.items()
+                   if key not in cached]
+    if unversioned:
+        for scope, version in get_versions(*unversioned).items():
+            cached[version_key(scope)] = version
+    fragments = {}
+    stale = []
+    for post in posts:
+        versions = tuple(
+            cached[version_key(scope)] for scope in scopes[post.pk])
+        fragment = cached.get(fragment_keys[post.pk])
+        if fragment is not None and fragment[0] == versions:
+            fragments[post.pk] = fragment[1]
+        else:
+            stale.append((post, versions))
+    # записи sorl о миниатюрах для всех перерисовываемых карточек
+    # одним запросом, а не по запросу на карточку
+    prefetch_thumbnails(post.image for post, _ in stale if post.image)
+    template = get_template(POST_TEMPLATE)
+    missing = {}
+    for post, versions in stale:
+        with recording_fallbacks() as fallbacks:
+            html = template.render({'post': post, 'group_link': group_link})
+        fragments[post.pk] = html
+        # пока фоновая миниатюра не готова, в карточке исходная
+        # картинка: такой фрагмент не кэшируем, чтобы не закрепить ее
+        if not fallbacks:
+            missing[fragment_keys[post.pk]] = (versions, html)
+    if missing:
+        cache.set_many(missing, settings.FEED_CACHE_TIMEOUT)
+    return [fragments[post.pk] for post in posts]
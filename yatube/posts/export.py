@@ -0,0 +1,73 @@
+import csv
+import json
+
+from .models import Comment, Post
+
+EXPORT_CHUNK = 2000
+CSV_COLUMNS = ('type', 'id', 'post_id', 'author', 'group', 'date', 'image',
+               'text')
+
+
+def export_rows(author, chunk_size=EXPORT_CHUNK):
+    """Посты и комментарии автора по одному, без моделей в памяти.
+
+    values_list() вместе с iterator() читает строки порциями по
+    chunk_size, поэтому память не зависит от объема истории.
+    """
+    posts = Post.objects.filter(
+        author=author, is_deleted=False).order_by('pk').values_list(
+        'pk', 'group__slug', 'pub_date', 'image', 'text')
+    for pk, group, pub_date, image, text in posts.iterator(chunk_size):
+        yield {
+            'type': 'post',
+            'id': pk,
+            'post_id': None,
+            'author': author.username,
+            'group': group,
+            'date': pub_date.isoformat(),
+            'image': image or None,
+            'text': text,
+        }
+    comments = Comment.objects.filter(
+        author=author, is_deleted=False).order_by('pk').values_list(
+        'pk', 'post_id', 'created', 'text')
+    for pk, post_id, created, text in comments.iterator(chunk_size):
+        yield {
+            'type': 'comment',
+            'id': pk,
+            'post_id': post_id,
+            'author': author.username,
+            'group': None,
+            'date': created.isoformat(),
+            'image': None,
+            'text': text,
+        }
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Псевдофайл для csv.writer: write() возвращает строку, а не пишет."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        yield writer.writerow(
+            ['' if row[column] is None else row[column]
+             for column in CSV_COLUMNS]
+        )
+
+
+# формат -> (генератор строк, content type, расширение файла)
+FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson', 'ndjson'),
+    'csv': (csv_lines, 'text/csv', 'csv'),
+}
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db.models import Count, F
+
+from .models import FeedItem, Follow, Post
+
+
+def feed_length():
+    return settings.FEED_MAX_LENGTH
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост в ленты всех подписчиков автора.
+
+    Возвращает id подписчиков, чьи ленты изменились.
+    """
+    follower_ids = list(Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True))
+    FeedItem.objects.bulk_create(
+        [FeedItem(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+         for user_id in follower_ids],
+        ignore_conflicts=True
+    )
+    trim_feeds(follower_ids)
+    return follower_ids
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора, на которого подписались."""
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('pk', 'pub_date')[:feed_length()]
+    FeedItem.objects.bulk_create(
+        [FeedItem(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts],
+        ignore_conflicts=True
+    )
+    trim_feed(user_id)
+
+
+def remove_author(user_id, author_id):
+    FeedItem.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete()
+
+
+def trim_feed(user_id):
+    """Обрезает ленту до FEED_MAX_LENGTH самых свежих записей."""
+    length = feed_length()
+    cutoff = list(FeedItem.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-pk').values_list('pub_date', 'pk')[length:length + 1])
+    if not cutoff:
+        return
+    pub_date, pk = cutoff[0]
+    FeedItem.objects.filter(user_id=user_id, pub_date__lte=pub_date).exclude(
+        pub_date=pub_date, pk__gt=pk).delete()
+
+
+def trim_feeds(user_ids, chunk_size=500):
+    """Обрезает ленты, переросшие FEED_MAX_LENGTH.
+
+    Длины лент порции считает один группирующий запрос, так что
+    обрезка трогает только те ленты, которым она нужна.
+    """
+    length = feed_length()
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), chunk_size):
+        # order_by() убирает Meta.ordering из GROUP BY
+        overgrown = list(FeedItem.objects.filter(
+            user_id__in=user_ids[start:start + chunk_size]
+        ).order_by().values('user_id').annotate(
+            total=Count('pk')).filter(total__gt=length).values_list(
+                'user_id', flat=True))
+        for user_id in overgrown:
+            trim_feed(user_id)
+
+
+def rebuild_feed(user_id):
+    """Пересобирает ленту пользователя с нуля по текущим подпискам."""
+    FeedItem.objects.filter(user_id=user_id).delete()
+    posts = Post.objects.filter(
+        author__following__user_id=user_id).order_by(
+            '-pub_date').values_list('pk', 'pub_date')[:feed_length()]
+    FeedItem.objects.bulk_create(
+        [FeedItem(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts]
+    )
+
+
+# поля get_feed, по которым листает курсор: индекс feed_user_pub_date_idx
+FEED_CURSOR = {'field': 'feed_pub_date', 'pk_field': 'feed_item_id'}
+
+
+def get_feed(user):
+    """Посты ленты подписок в порядке записей FeedItem.
+
+    Сортировка и курсор идут по дате и id записи ленты, а не поста:
+    только так база читает индекс (user, -pub_date, -id) без сортировки
+    всей ленты.
+    """
+    return Post.objects.for_feed().filter(feed_items__user=user).annotate(
+        feed_pub_date=F('feed_items__pub_date'),
+        feed_item_id=F('feed_items__pk'),
+    ).order_by('-feed_pub_date', '-feed_item_id')
@@ -1,6 +1,8 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
 
+from .images import check_upload, process_upload
 from .models import Post, Comment
 
 
@@ -10,6 +12,14 @@ class PostForm(ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # при редактировании без новой картинки здесь сохраненный файл
+        if not isinstance(image, UploadedFile):
+            return image
+        check_upload(image)
+        return process_upload(image)
+
 
 class CommentForm(ModelForm):
 
@@ -0,0 +1,84 @@
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps, features
+
+# перекодированный файл больше этого пишется во временный файл на диске
+SPOOL_SIZE = 2 * 2 ** 20
+# форматы, которые перекодируются, и расширения для них; остальные
+# (GIF) и анимации сохраняются как загружены
+REENCODED = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+# ключи image.info с метаданными, которые не нужны на сайте
+METADATA = ('exif', 'icc_profile', 'xmp', 'comment', 'dpi', 'photoshop')
+
+
+def check_upload(upload):
+    """Проверяет размер файла и картинки до декодирования пикселей.
+
+    forms.ImageField уже открыл файл и положил в upload.image объект
+    Pillow, у которого прочитан только заголовок, поэтому размеры
+    известны без распаковки изображения.
+    """
+    if upload.size > settings.POST_IMAGE_MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)d МБ',
+            params={'limit': settings.POST_IMAGE_MAX_BYTES // 2 ** 20},
+            code='file_too_large'
+        )
+    width, height = upload.image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)d×%(height)d слишком большая',
+            params={'width': width, 'height': height},
+            code='image_too_large'
+        )
+
+
+def needs_reencode(image, target_format):
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    return (
+        image.format != target_format
+        or max(image.size) > max_side
+        or any(key in image.info for key in METADATA)
+        or image.getexif()
+    )
+
+
+def process_upload(upload):
+    """Уменьшает картинку до POST_IMAGE_MAX_SIDE и убирает метаданные.
+
+    Возвращает upload без изменений, если перекодировать нечего:
+    повторное сжатие JPEG только теряет качество.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    if image.format not in REENCODED or getattr(image, 'is_animated', False):
+        upload.seek(0)
+        return upload
+    target_format = image.format
+    # WebP доступен, только если Pillow собран с libwebp
+    if settings.POST_IMAGE_WEBP and features.check('webp'):
+        target_format = 'WEBP'
+    if not needs_reencode(image, target_format):
+        upload.seek(0)
+        return upload
+    # поворот по EXIF применяется к пикселям: сам EXIF будет удален
+    image = ImageOps.exif_transpose(image)
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    if target_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    # PNG берет EXIF и ICC из info, если их не передать явно
+    image.info = {key: value for key, value in image.info.items()
+                  if key not in METADATA}
+    output = SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    options = {'optimize': True}
+    if target_format in ('JPEG', 'WEBP'):
+        options['quality'] = settings.POST_IMAGE_QUALITY
+    image.save(output, target_format, **options)
+    output.seek(0)
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return File(output, name=f'{name}.{REENCODED[target_format]}')
@@ -0,0 +1,57 @@
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageOps
+
+from core.benchmark import summarize
+from posts.images import process_upload
+
+
+class Command(BaseCommand):
+    help = ('Размер файла и время миниатюры для исходной фотографии и '
+            'после обработки загрузки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=4000)
+        parser.add_argument('--height', type=int, default=3000)
+        parser.add_argument('--renders', type=int, default=10)
+
+    def photo(self, width, height):
+        """JPEG с шумом и EXIF, похожий на снимок с телефона."""
+        image = Image.effect_noise((width, height), 64).convert('RGB')
+        exif = Image.Exif()
+        exif[0x010F] = 'Phone'
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=92, exif=exif.tobytes())
+        return buffer.getvalue()
+
+    def thumbnail_ms(self, data, renders):
+        """Время одной миниатюры из POST_THUMBNAIL_SIZES, как у sorl."""
+        geometry = settings.POST_THUMBNAIL_SIZES[0][0]
+        size = tuple(int(side) for side in geometry.split('x'))
+        timings = []
+        for _ in range(renders):
+            start = time.perf_counter()
+            image = Image.open(BytesIO(data))
+            ImageOps.fit(image, size, Image.LANCZOS).save(
+                BytesIO(), 'JPEG')
+            timings.append((time.perf_counter() - start) * 1000)
+        return summarize(timings)['mean']
+
+    def handle(self, *args, **options):
+        original = self.photo(options['width'], options['height'])
+        upload = SimpleUploadedFile('photo.jpg', original)
+        start = time.perf_counter()
+        processed = process_upload(upload).read()
+        process_ms = (time.perf_counter() - start) * 1000
+        for name, data in (('original', original), ('processed', processed)):
+            size = Image.open(BytesIO(data)).size
+            self.stdout.write(
+                f'{name:10} {size[0]}x{size[1]} {len(data) / 1024:.0f} KiB, '
+                f'миниатюра {self.thumbnail_ms(data, options["renders"]):.0f}'
+                f' ms'
+            )
+        self.stdout.write(f'обработка загрузки: {process_ms:.0f} ms')
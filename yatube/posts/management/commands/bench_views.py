@@ -0,0 +1,174 @@
+import json
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.template import RequestContext
+from django.template.loader import get_template
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmark import summarize
+from posts.models import Comment, Group, Post
+from posts.utils import POST_NUM
+from users.models import Profile
+
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+HEADER_TEMPLATE = 'includes/header.html'
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку и число запросов к БД у основных страниц; '
+            'результат можно сохранить в JSON и сравнить с прошлым')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='замеров на каждую страницу'
+        )
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='очищать кэш перед каждым запросом'
+        )
+        parser.add_argument(
+            '--view', action='append', dest='views',
+            help='замерить только эту страницу; можно несколько раз'
+        )
+        parser.add_argument('--output', help='куда записать JSON')
+        parser.add_argument(
+            '--compare', help='JSON прошлого замера для сравнения')
+
+    def handle(self, *args, **options):
+        targets = self.get_targets()
+        if options['views']:
+            targets = [target for target in targets
+                       if target[0] in options['views']]
+        if not targets:
+            raise CommandError('Нет данных: запустите generate_load')
+        results = {}
+        for name, path, client in targets:
+            results[name] = self.measure(
+                client, path, options['requests'], options['warmup'],
+                options['cold']
+            )
+            self.report(name, results[name])
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'requests': options['requests'],
+                'cold': options['cold'],
+                'database': settings.DATABASES['default']['ENGINE'],
+                'cache': settings.CACHES['default']['BACKEND'],
+                'posts': Post.objects.count(),
+            },
+            'views': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2, ensure_ascii=False)
+        if options['compare']:
+            with open(options['compare']) as file:
+                self.compare(json.load(file)['views'], results)
+
+    def get_targets(self):
+        """Страницы для замера, выбранные по самым тяжелым данным."""
+        anonymous = Client()
+        targets = []
+        posts_count = Post.objects.count()
+        if not posts_count:
+            return targets
+        targets.append(('index', reverse('posts:index'), anonymous))
+        middle = max(posts_count // POST_NUM // 2, 1)
+        targets.append(('index_deep', f'{reverse("posts:index")}'
+                        f'?page={middle}', anonymous))
+        group = Group.objects.annotate(
+            total=Count('posts')).order_by('-total').first()
+        if group:
+            targets.append(('group_list', reverse(
+                'posts:group_list', args=[group.slug]), anonymous))
+        author = Profile.objects.select_related('user').order_by(
+            '-posts_count').first()
+        if author:
+            targets.append(('profile', reverse(
+                'posts:profile', args=[author.user.username]), anonymous))
+        post_id = Comment.objects.values('post').annotate(
+            total=Count('pk')).order_by('-total').values_list(
+                'post', flat=True).first()
+        if post_id is None:
+            post_id = Post.objects.values_list('pk', flat=True).first()
+        targets.append(('post_detail', reverse(
+            'posts:post_detail', args=[post_id]), anonymous))
+        reader = Profile.objects.select_related('user').order_by(
+            '-follower_count').first()
+        if reader:
+            client = Client()
+            client.force_login(reader.user)
+            targets.append(
+                ('follow_index', reverse('posts:follow_index'), client))
+        return targets
+
+    def measure(self, client, path, requests, warmup, cold):
+        for _ in range(warmup):
+            client.get(path)
+        timings = []
+        db_timings = []
+        queries = []
+        response = None
+        for _ in range(requests):
+            if cold:
+                cache.clear()
+            start = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+            match = SERVER_TIMING.search(response.get('Server-Timing', ''))
+            if match:
+                db_timings.append(float(match.group(1)))
+                queries.append(int(match.group(2)))
+        result = {'path': path, 'status': response.status_code}
+        result.update(summarize(timings))
+        result['db_ms'] = summarize(db_timings)['mean']
+        result['queries'] = max(queries) if queries else None
+        result['header_ms'] = self.measure_header(
+            response.wsgi_request, requests)
+        return result
+
+    def measure_header(self, request, renders):
+        """Среднее время рендера шапки в контексте запроса страницы."""
+        template = get_template(HEADER_TEMPLATE).template
+        timings = []
+        for _ in range(renders):
+            start = time.perf_counter()
+            template.render(RequestContext(request, {}))
+            timings.append((time.perf_counter() - start) * 1000)
+        return summarize(timings)['mean']
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<12} {result["status"]} '
+            f'p50={result["p50"]:.1f}ms p95={result["p95"]:.1f}ms '
+            f'p99={result["p99"]:.1f}ms db={result["db_ms"]:.1f}ms '
+            f'queries={result["queries"]} '
+            f'header={result["header_ms"]:.2f}ms '
+            f'({result["header_ms"] / result["p50"] * 100:.1f}% of p50)'
+        )
+
+    def compare(self, baseline, results):
+        self.stdout.write('Сравнение с прошлым замером (p50, p95, запросы):')
+        for name, result in results.items():
+            old = baseline.get(name)
+            if old is None:
+                continue
+            changes = ' '.join(
+                f'{key}={(result[key] - old[key]) / old[key] * 100:+.0f}%'
+                if old[key] else f'{key}=n/a'
+                for key in ('p50', 'p95')
+            )
+            self.stdout.write(
+                f'{name:<12} {changes} '
+                f'queries={old["queries"]}->{result["queries"]}'
+            )
@@ -0,0 +1,213 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from faker import Faker
+
+from posts.feed import rebuild_feed
+from posts.importer import explicit_dates
+from posts.models import Comment, Follow, Group, Post
+from users.models import Profile
+
+User = get_user_model()
+
+TEXT_POOL_SIZE = 500
+
+
+def last_id(model):
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+class Command(BaseCommand):
+    help = ('Генерирует синтетические данные для нагрузочных замеров: '
+            'пользователей, группы, посты, подписки и комментарии')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='на сколько дней назад растянуть даты публикаций'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--prefix', default='load',
+            help='префикс имен пользователей и slug групп'
+        )
+        parser.add_argument(
+            '--skip-feeds', action='store_true',
+            help='не пересобирать ленты подписок после генерации'
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.now = timezone.now()
+        self.period = timedelta(days=options['days']).total_seconds()
+        faker = Faker('ru_RU')
+        faker.seed_instance(options['seed'])
+        self.texts = [faker.text(max_nb_chars=300)
+                      for _ in range(TEXT_POOL_SIZE)]
+
+        if options['users'] < 2:
+            raise CommandError('Нужно хотя бы два пользователя')
+        user_ids = self.create_users(options['users'])
+        group_ids = self.create_groups(options['groups'])
+        # популярность авторов по закону Ципфа: у немногих много постов
+        # и подписчиков, как на живом сайте
+        self.author_weights = list(accumulate(
+            1 / rank for rank in range(1, len(user_ids) + 1)))
+        posts_count = self.create_posts(
+            options['posts'], user_ids, group_ids)
+        follows = self.create_follows(options['follows'], user_ids)
+        self.create_comments(options['comments'], user_ids)
+        self.create_profiles(user_ids, posts_count, follows)
+        if not options['skip_feeds']:
+            followers = sorted({user_id for user_id, _ in follows})
+            for offset, size in self.batches(len(followers)):
+                with transaction.atomic():
+                    for user_id in followers[offset:offset + size]:
+                        rebuild_feed(user_id)
+            self.log(f'Пересобрано лент: {len(followers)}')
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы'))
+
+    def log(self, message):
+        self.stdout.write(message)
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def random_date(self):
+        return self.now - timedelta(
+            seconds=self.random.random() * self.period)
+
+    def pick_author(self, user_ids):
+        return self.random.choices(
+            user_ids, cum_weights=self.author_weights)[0]
+
+    def create_users(self, total):
+        # берем только созданные сейчас строки: команду можно запускать
+        # повторно, и прошлые данные не должны попасть в счетчики
+        last_pk = last_id(User)
+        start = User.objects.filter(
+            username__startswith=f'{self.prefix}_').count()
+        for offset, size in self.batches(total):
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    [User(username=f'{self.prefix}_{start + offset + i}',
+                          password='!')
+                     for i in range(size)]
+                )
+        user_ids = list(User.objects.filter(
+            pk__gt=last_pk).values_list('pk', flat=True))
+        self.random.shuffle(user_ids)
+        self.log(f'Пользователей: {total}')
+        return user_ids
+
+    def create_groups(self, total):
+        last_pk = last_id(Group)
+        start = Group.objects.filter(
+            slug__startswith=f'{self.prefix}-').count()
+        Group.objects.bulk_create([
+            Group(title=f'Группа {start + i}',
+                  slug=f'{self.prefix}-{start + i}',
+                  description=self.random.choice(self.texts))
+            for i in range(total)
+        ])
+        self.log(f'Групп: {total}')
+        return list(Group.objects.filter(
+            pk__gt=last_pk).values_list('pk', flat=True))
+
+    def create_posts(self, total, user_ids, group_ids):
+        self.last_post_pk = last_id(Post)
+        posts_count = {}
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            for _, size in self.batches(total):
+                posts = []
+                for _ in range(size):
+                    author_id = self.pick_author(user_ids)
+                    posts_count[author_id] = posts_count.get(author_id, 0) + 1
+                    group_id = (self.random.choice(group_ids)
+                                if group_ids and self.random.random() < 0.5
+                                else None)
+                    posts.append(Post(
+                        text=self.random.choice(self.texts),
+                        author_id=author_id,
+                        group_id=group_id,
+                        pub_date=self.random_date(),
+                    ))
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+        self.log(f'Постов: {total}')
+        return posts_count
+
+    def create_follows(self, total, user_ids):
+        # со случайным выбором пар не добраться до полного графа,
+        # поэтому не больше половины возможных пар
+        total = min(total, len(user_ids) * (len(user_ids) - 1) // 2)
+        follows = set()
+        while len(follows) < total:
+            user_id = self.random.choice(user_ids)
+            author_id = self.pick_author(user_ids)
+            if user_id != author_id:
+                follows.add((user_id, author_id))
+        follows = list(follows)
+        for offset, size in self.batches(total):
+            with transaction.atomic():
+                Follow.objects.bulk_create(
+                    [Follow(user_id=user_id, author_id=author_id)
+                     for user_id, author_id in follows[offset:offset + size]]
+                )
+        self.log(f'Подписок: {total}')
+        return follows
+
+    def create_comments(self, total, user_ids):
+        # id новых постов идут подряд, поэтому пост выбирается числом
+        # из их диапазона, без списка id в памяти; начало берем из БД:
+        # AUTOINCREMENT не переиспользует id удаленных постов
+        bounds = Post.objects.filter(pk__gt=self.last_post_pk).aggregate(
+            first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            return
+        first_pk, last_pk = bounds['first'], bounds['last']
+        with explicit_dates(Comment._meta.get_field('created')):
+            for _, size in self.batches(total):
+                with transaction.atomic():
+                    Comment.objects.bulk_create([
+                        Comment(
+                            post_id=self.random.randint(first_pk, last_pk),
+                            author_id=self.random.choice(user_ids),
+                            text=self.random.choice(self.texts)[:200],
+                            created=self.random_date(),
+                        )
+                        for _ in range(size)
+                    ])
+        self.log(f'Комментариев: {total}')
+
+    def create_profiles(self, user_ids, posts_count, follows):
+        # bulk_create не шлет сигналы, поэтому счетчики считаем сами
+        follower_count = {}
+        following_count = {}
+        for user_id, author_id in follows:
+            follower_count[user_id] = follower_count.get(user_id, 0) + 1
+            following_count[author_id] = following_count.get(author_id, 0) + 1
+        profiles = [
+            Profile(user_id=user_id,
+                    posts_count=posts_count.get(user_id, 0),
+                    follower_count=follower_count.get(user_id, 0),
+                    following_count=following_count.get(user_id, 0))
+            for user_id in user_ids
+        ]
+        with transaction.atomic():
+            Profile.objects.bulk_create(profiles)
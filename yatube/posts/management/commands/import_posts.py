@@ -0,0 +1,103 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import BATCH_SIZE, Importer, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Загружает посты, комментарии и подписки из NDJSON или CSV '
+            'порциями через bulk_create, с возможностью продолжить')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл .ndjson или .csv')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='по умолчанию — по расширению файла'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--checkpoint',
+            help='файл с прогрессом; по умолчанию <path>.checkpoint'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='начать заново, не глядя на сохраненный прогресс'
+        )
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='создавать неизвестных авторов без пароля'
+        )
+        parser.add_argument(
+            '--create-groups', action='store_true',
+            help='создавать неизвестные группы по slug'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        self.verbosity = options['verbosity']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson')
+        self.checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        checkpoint = {} if options['restart'] else self.load_checkpoint()
+        done_line = checkpoint.get('line', 0)
+        if done_line:
+            self.stdout.write(f'Продолжаем после строки {done_line}')
+
+        importer = Importer(
+            create_users=options['create_users'],
+            create_groups=options['create_groups'],
+        )
+        importer.touched_users.update(checkpoint.get('users', ()))
+        importer.touched_groups.update(checkpoint.get('groups', ()))
+        batch = []
+        with open(path, encoding='utf-8', newline='') as file:
+            for line, row in read_rows(file, file_format):
+                if line <= done_line:
+                    continue
+                batch.append((line, row))
+                if len(batch) >= options['batch_size']:
+                    self.flush(importer, batch, checkpoint)
+                    batch = []
+        if batch:
+            self.flush(importer, batch, checkpoint)
+
+        feeds = importer.finish()
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        for line, message in importer.errors:
+            self.stderr.write(f'строка {line}: {message}')
+        stats = importer.stats
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов: {stats["post"]}, комментариев: {stats["comment"]}, '
+            f'подписок: {stats["follow"]}, уже были: {stats["skipped"]}, '
+            f'ошибок: {stats["errors"]}, пересобрано лент: {feeds}'
+        ))
+
+    def flush(self, importer, batch, checkpoint):
+        importer.import_batch(batch)
+        # прогресс пишется после коммита порции; при сбое между ними
+        # порция повторится, а записи с id отсеются как уже загруженные
+        checkpoint['line'] = batch[-1][0]
+        # затронутых пользователей и группы помним до конца загрузки:
+        # по ним в конце пересчитываются счетчики, ленты и кэш
+        checkpoint['users'] = list(importer.touched_users)
+        checkpoint['groups'] = list(importer.touched_groups)
+        self.save_checkpoint(checkpoint)
+        if self.verbosity > 1:
+            self.stdout.write(f'Загружено до строки {checkpoint["line"]}')
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as file:
+            return json.load(file)
+
+    def save_checkpoint(self, checkpoint):
+        temporary = f'{self.checkpoint_path}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(checkpoint, file)
+        os.replace(temporary, self.checkpoint_path)
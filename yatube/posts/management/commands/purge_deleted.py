@@ -0,0 +1,32 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from posts.purge import PURGE_BATCH, purge
+
+
+class Command(BaseCommand):
+    help = ('Удаляет мягко удаленные посты, комментарии и пользователей '
+            'вместе с подписками и картинками, порциями')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH)
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help='остановиться после стольких порций'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='пауза между порциями в секундах, чтобы не держать БД'
+        )
+
+    def handle(self, *args, **options):
+        totals = Counter()
+        for name, count in purge(options['batch_size'],
+                                 options['max_batches'], options['pause']):
+            totals[name] += count
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{name}: {count}')
+        summary = ', '.join(
+            f'{name}: {count}' for name, count in totals.items()) or 'нечего'
+        self.stdout.write(self.style.SUCCESS(f'Удалено — {summary}'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed import rebuild_feed, trim_feed
+from posts.models import FeedItem, Follow
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='id пользователя; можно указать несколько раз'
+        )
+        parser.add_argument(
+            '--trim', action='store_true',
+            help='только обрезать ленты до FEED_MAX_LENGTH'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['users']
+        if options['trim']:
+            if not user_ids:
+                user_ids = FeedItem.objects.values_list(
+                    'user_id', flat=True).distinct()
+            for user_id in user_ids:
+                trim_feed(user_id)
+            self.stdout.write(self.style.SUCCESS('Ленты обрезаны'))
+            return
+        if not user_ids:
+            user_ids = Follow.objects.values_list(
+                'user_id', flat=True).distinct()
+        count = 0
+        for user_id in user_ids:
+            rebuild_feed(user_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Пересобрано лент: {count}'))
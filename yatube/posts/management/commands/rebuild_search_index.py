@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.search import fts_enabled, install, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов (SQLite FTS5)'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            raise CommandError(
+                'Индекс FTS5 выключен: POSTS_SEARCH_FTS или база не SQLite')
+        install()
+        rebuild()
+        self.stdout.write(self.style.SUCCESS('Индекс перестроен'))
@@ -2,9 +2,33 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.db.models import UniqueConstraint
 
+from .storage import image_storage
+
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    def visible(self):
+        """Без мягко удаленных постов и постов удаленных авторов."""
+        return self.filter(is_deleted=False, author__is_active=True)
+
+    def for_feed(self):
+        """Посты для лент: автор и группа одним JOIN-запросом."""
+        return self.visible().select_related('author', 'group')
+
+    def for_detail(self):
+        return self.visible().select_related(
+            'author', 'author__profile', 'group')
+
+
+class CommentQuerySet(models.QuerySet):
+    def visible(self):
+        return self.filter(is_deleted=False, author__is_active=True)
+
+    def for_detail(self):
+        return self.visible().select_related('author')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
@@ -29,16 +53,35 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Выберите группу'
     )
+    # одинаковые картинки хранятся одним файлом; индекс нужен для
+    # подсчета ссылок перед удалением файла
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=image_storage,
+        blank=True,
+        db_index=True
     )
+    # мягкое удаление: пост сразу скрыт, а строки и файлы удалит
+    # команда purge_deleted порциями
+    is_deleted = models.BooleanField('Удален', default=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # индексы под сортировку каждой ленты: главная, автор, группа;
+        # id в конце — для курсорной пагинации по (pub_date, id)
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -75,11 +118,18 @@ class Comment(models.Model):
     )
 
     created = models.DateTimeField(auto_now_add=True)
+    is_deleted = models.BooleanField('Удален', default=False)
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('-created',)
         verbose_name = 'Комментарий',
         verbose_name_plural = 'Comment'
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+        ]
 
 
 class Follow(models.Model):
@@ -103,3 +153,38 @@ class Follow(models.Model):
         constraints = [
             UniqueConstraint(fields=['user', 'author'], name='unique_follow')
         ]
+
+
+class FeedItem(models.Model):
+    """Запись материализованной ленты подписок пользователя.
+
+    Заполняется при публикации поста (fan-out on write) и при подписке,
+    поэтому страница /follow/ читает готовый отсортированный диапазон.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Пост'
+    )
+    # копия post.pub_date, чтобы сортировать ленту по индексу (user, date)
+    pub_date = models.DateTimeField(verbose_name='pub_date')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-id'],
+                         name='feed_user_pub_date_idx'),
+        ]
+        constraints = [
+            UniqueConstraint(fields=['user', 'post'],
+                             name='unique_feed_item')
+        ]
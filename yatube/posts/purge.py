@@ -0,0 +1,152 @@
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+from sorl.thumbnail.images import ImageFile
+
+from core.jobs import enqueue
+from users.models import Profile
+
+from .cache import bump_versions
+from .models import Comment, FeedItem, Follow, Post
+from .storage import image_storage
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH = 500
+
+
+def schedule_purge():
+    # задержка оставляет время восстановить удаленное по ошибке
+    enqueue('posts.purge_deleted', key='posts.purge_deleted',
+            delay=settings.PURGE_DELAY)
+
+
+def soft_delete_posts(posts):
+    """Скрывает посты сразу; строки удалит фоновая задача."""
+    for post in posts:
+        if not post.is_deleted:
+            post.is_deleted = True
+            post.save(update_fields=['is_deleted'])
+    schedule_purge()
+
+
+def restore_posts(posts):
+    for post in posts:
+        if post.is_deleted:
+            post.is_deleted = False
+            post.save(update_fields=['is_deleted'])
+
+
+def soft_delete_user(user):
+    """Деактивирует пользователя и сразу скрывает весь его контент.
+
+    Ленты фильтруют авторов по is_active, поэтому хватает двух UPDATE;
+    сами посты, комментарии и подписки удалит фоновая задача порциями.
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        Profile.objects.update_or_create(
+            user=user, defaults={'deleted_at': timezone.now()})
+    user.is_active = False
+    group_ids = Post.objects.filter(author=user).exclude(
+        group=None).order_by().values_list('group_id', flat=True).distinct()
+    commented = Comment.objects.filter(author=user).order_by().values_list(
+        'post_id', flat=True).distinct()
+    bump_versions(
+        'posts', f'author:{user.pk}', f'follow:{user.pk}',
+        f'followers:{user.pk}',
+        *(f'group:{group_id}' for group_id in group_ids),
+        *(f'comments:{post_id}' for post_id in commented),
+    )
+    schedule_purge()
+
+
+def deleted_users():
+    return User.objects.filter(profile__deleted_at__isnull=False)
+
+
+def release_images(names):
+    """Удаляет картинки, на которые больше не ссылается ни один пост.
+
+    Хранилище складывает одинаковые загрузки в один файл, поэтому
+    перед удалением считаем ссылки на имя (поле image индексировано).
+    Подсчет и удаление идут под блокировкой хранилища, а файл,
+    сохраненный за последние POST_IMAGE_RELEASE_GRACE секунд, может
+    ждать коммита ссылающегося поста: его проверка откладывается.
+    """
+    grace = settings.POST_IMAGE_RELEASE_GRACE
+    for name in names:
+        with image_storage.locked():
+            if Post.objects.filter(image=name).exists():
+                continue
+            try:
+                if image_storage.recently_saved(name, grace):
+                    enqueue('posts.release_image', name, delay=grace)
+                    continue
+                # вместе с исходником удаляет миниатюры и их записи sorl
+                delete_image(ImageFile(name, image_storage))
+            except Exception as error:
+                logger.warning(
+                    'Не удалось удалить картинку %s: %s', name, error)
+
+
+def purge_steps():
+    """Что удалять и в каком порядке: сначала зависимые строки.
+
+    Каждый шаг — queryset, который выбирается порциями по id, поэтому
+    ни одно удаление не трогает больше batch_size строк за транзакцию.
+    """
+    return [
+        ('comments', Comment.objects.filter(is_deleted=True)),
+        ('comments', Comment.objects.filter(post__is_deleted=True)),
+        ('comments', Comment.objects.filter(author__in=deleted_users())),
+        ('comments', Comment.objects.filter(
+            post__author__in=deleted_users())),
+        # ленты — до подписок: удаление подписки чистит ленту сигналом,
+        # целиком в той же порции
+        ('feed items', FeedItem.objects.filter(user__in=deleted_users())),
+        ('feed items', FeedItem.objects.filter(
+            post__author__in=deleted_users())),
+        ('feed items', FeedItem.objects.filter(post__is_deleted=True)),
+        ('follows', Follow.objects.filter(user__in=deleted_users())),
+        ('follows', Follow.objects.filter(author__in=deleted_users())),
+        ('posts', Post.objects.filter(is_deleted=True)),
+        ('posts', Post.objects.filter(author__in=deleted_users())),
+        ('users', deleted_users()),
+    ]
+
+
+def purge_batch(queryset, batch_size=PURGE_BATCH):
+    """Удаляет одну порцию строк queryset; возвращает их число."""
+    model = queryset.model
+    ids = list(queryset.order_by().values_list(
+        'pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    with transaction.atomic():
+        if model is Post:
+            images = [name for name in Post.objects.filter(
+                pk__in=ids).values_list('image', flat=True) if name]
+            transaction.on_commit(lambda: release_images(images))
+        model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def purge(batch_size=PURGE_BATCH, max_batches=None, pause=0):
+    """Удаляет мягко удаленное порциями; отдает (шаг, удалено) на порцию."""
+    batches = 0
+    for name, queryset in purge_steps():
+        while max_batches is None or batches < max_batches:
+            count = purge_batch(queryset, batch_size)
+            if not count:
+                break
+            batches += 1
+            yield name, count
+            if pause:
+                time.sleep(pause)
@@ -0,0 +1,225 @@
+import re
+from functools import reduce
+from operator import and_
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post, User
+
+FTS_TABLE = 'posts_post_fts'
+MAX_TERMS = 8
+SNIPPET_TOKENS = 24
+SNIPPET_CHARS = 200
+# служебные символы вместо тегов: snippet() возвращает сырой текст поста,
+# и теги подставляются только после экранирования
+MARK_START = '\x02'
+MARK_END = '\x03'
+TERM_RE = re.compile(r'\w+')
+
+# Индекс FTS5 с внешним содержимым: сам текст хранится в posts_post,
+# а триггеры обновляют индекс при любой записи, включая bulk_create
+# и queryset.update(), которые не шлют сигналов.
+INSTALL_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='posts_post', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert "
+    f"AFTER INSERT ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete "
+    f"AFTER DELETE ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update "
+    f"AFTER UPDATE OF text ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+]
+TRIGGERS = [f'{FTS_TABLE}_insert', f'{FTS_TABLE}_delete',
+            f'{FTS_TABLE}_update']
+# мягко удаленные посты и посты удаленных авторов остаются в индексе
+# до purge_deleted, поэтому отсеиваются при поиске
+VISIBLE_JOIN = (
+    f'JOIN posts_post ON posts_post.id = {FTS_TABLE}.rowid '
+    f'JOIN {User._meta.db_table} author '
+    f'ON author.id = posts_post.author_id'
+)
+VISIBLE_WHERE = 'AND NOT posts_post.is_deleted AND author.is_active'
+
+
+def fts_enabled(using=connection):
+    return settings.POSTS_SEARCH_FTS and using.vendor == 'sqlite'
+
+
+def install(using=connection):
+    """Создает индекс и триггеры, если их нет, и при этом перестраивает.
+
+    Вызывается из миграции и после каждого migrate: на SQLite Django
+    меняет схему таблицы пересозданием, и триггеры пропадают вместе
+    со старой таблицей.
+    """
+    if not fts_enabled(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master "
+            "WHERE type = 'trigger' AND name IN "
+            f"({', '.join(['%s'] * len(TRIGGERS))})",
+            TRIGGERS
+        )
+        complete = cursor.fetchone()[0] == len(TRIGGERS)
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+        if not complete:
+            rebuild(using)
+
+
+def uninstall(using=connection):
+    if using.vendor != 'sqlite':
+        return
+    with using.cursor() as cursor:
+        for trigger in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def rebuild(using=connection):
+    """Перестраивает индекс целиком по таблице постов."""
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def parse_terms(query):
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def match_expression(terms):
+    # каждое слово — префиксный запрос в кавычках: так синтаксис FTS5
+    # в запросе пользователя не работает, а «котик» найдет «котики»
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def highlight(snippet):
+    return mark_safe(escape(snippet).replace(
+        MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def text_snippet(text, terms):
+    """Фрагмент текста вокруг первого найденного слова, без индекса."""
+    lowered = text.lower()
+    positions = [lowered.find(term) for term in terms]
+    start = min([position for position in positions if position >= 0],
+                default=0)
+    start = max(start - SNIPPET_CHARS // 4, 0)
+    fragment = text[start:start + SNIPPET_CHARS]
+    pattern = re.compile(
+        '|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    fragment = pattern.sub(
+        lambda match: f'{MARK_START}{match.group()}{MARK_END}', fragment)
+    prefix = '…' if start else ''
+    suffix = '…' if start + SNIPPET_CHARS < len(text) else ''
+    return highlight(f'{prefix}{fragment}{suffix}')
+
+
+class SearchResults:
+    """Результаты поиска для Paginator: count() и срезы.
+
+    Срез выбирает из индекса id страницы в порядке релевантности (bm25)
+    вместе с подсвеченным фрагментом, а посты догружает одним запросом.
+    """
+
+    def __init__(self, terms):
+        self.terms = terms
+        self.match = match_expression(terms)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {FTS_TABLE} {VISIBLE_JOIN} '
+                    f'WHERE {FTS_TABLE} MATCH %s {VISIBLE_WHERE}',
+                    [self.match]
+                )
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {FTS_TABLE}.rowid, '
+                f'snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {FTS_TABLE} {VISIBLE_JOIN} '
+                f'WHERE {FTS_TABLE} MATCH %s {VISIBLE_WHERE} '
+                f'ORDER BY bm25({FTS_TABLE}), {FTS_TABLE}.rowid DESC '
+                f'LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, '…', SNIPPET_TOKENS, self.match,
+                 index.stop - start, start]
+            )
+            rows = cursor.fetchall()
+        posts = Post.objects.for_feed().in_bulk(
+            [post_id for post_id, _ in rows])
+        results = []
+        for post_id, snippet in rows:
+            post = posts.get(post_id)
+            if post is not None:
+                post.snippet = highlight(snippet)
+                results.append(post)
+        return results
+
+
+class FallbackSearchResults:
+    """Поиск через LIKE для баз без FTS5: медленный, но тот же интерфейс."""
+
+    def __init__(self, terms):
+        self.terms = terms
+        self.queryset = Post.objects.for_feed().filter(
+            reduce(and_, [Q(text__icontains=term) for term in terms]))
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        posts = list(self.queryset[index])
+        for post in posts:
+            post.snippet = text_snippet(post.text, self.terms)
+        return posts
+
+
+def search_posts(query):
+    """Посты по запросу, самые релевантные первыми; None для пустого."""
+    terms = parse_terms(query)
+    if not terms:
+        return None
+    if fts_enabled():
+        return SearchResults(terms)
+    return FallbackSearchResults(terms)
+
+
+def filter_posts(queryset, query):
+    """Фильтр queryset постов по индексу; None, если индекса нет."""
+    terms = parse_terms(query)
+    if not terms or not fts_enabled():
+        return None
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match_expression(terms)]
+    ))
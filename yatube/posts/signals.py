@@ -0,0 +1,104 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.jobs import enqueue
+from users.counters import change_counter
+
+from . import feed
+from .cache import bump_versions, post_scopes
+from .models import Comment, Follow, Group, Post, User
+
+# поля пользователя, которые выводит карточка поста
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    # запоминаем группу, чтобы при смене сбросить ленты обеих групп,
+    # и картинку, чтобы заказывать миниатюры только для новой
+    # __dict__, а не атрибуты: у отложенных через only() полей чтение
+    # атрибута стоило бы отдельного запроса
+    instance._initial_group_id = instance.__dict__.get('group_id')
+    instance._initial_image = str(instance.__dict__.get('image') or '')
+    instance._initial_is_deleted = instance.__dict__.get('is_deleted', False)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        # счетчик и версии кэша меняются в той же транзакции, чтобы
+        # автор сразу увидел свой пост; раскладка по лентам подписчиков
+        # может быть долгой и уходит в очередь
+        change_counter(instance.author_id, 'posts_count', 1)
+        enqueue('posts.fan_out_post', instance.pk)
+    elif instance.is_deleted != instance._initial_is_deleted:
+        # мягкое удаление или восстановление
+        change_counter(instance.author_id, 'posts_count',
+                       -1 if instance.is_deleted else 1)
+        instance._initial_is_deleted = instance.is_deleted
+    bump_versions(*post_scopes(instance, instance._initial_group_id))
+    instance._initial_group_id = instance.group_id
+    if instance.image.name != instance._initial_image:
+        if instance.image:
+            enqueue('posts.pregenerate_thumbnails', instance.image.name)
+        if instance._initial_image:
+            # старый файл может быть общим с другими постами
+            enqueue('posts.release_image', instance._initial_image)
+    instance._initial_image = instance.image.name
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if not instance._initial_is_deleted:
+        change_counter(instance.author_id, 'posts_count', -1)
+    bump_versions(*post_scopes(instance, instance._initial_group_id))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_versions(f'comments:{instance.post_id}')
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, raw, **kwargs):
+    if not raw:
+        # карточки с ссылкой на группу есть и в общих лентах
+        bump_versions('posts', f'group:{instance.pk}',
+                      f'group_card:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw, update_fields, **kwargs):
+    # last_login обновляется при каждом входе и в карточках не виден
+    if created or raw or (
+            update_fields and not CARD_USER_FIELDS & set(update_fields)):
+        return
+    group_ids = Post.objects.filter(author=instance).exclude(
+        group=None).order_by().values_list('group_id', flat=True).distinct()
+    bump_versions(
+        'posts', f'author:{instance.pk}', f'author_card:{instance.pk}',
+        *(f'group:{group_id}' for group_id in group_ids),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        change_counter(instance.user_id, 'follower_count', 1)
+        change_counter(instance.author_id, 'following_count', 1)
+        feed.backfill(instance.user_id, instance.author_id)
+        bump_versions(f'follow:{instance.user_id}',
+                      f'followers:{instance.author_id}')
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_counter(instance.user_id, 'follower_count', -1)
+    change_counter(instance.author_id, 'following_count', -1)
+    feed.remove_author(instance.user_id, instance.author_id)
+    bump_versions(f'follow:{instance.user_id}',
+                  f'followers:{instance.author_id}')
@@ -0,0 +1,72 @@
+import fcntl
+import hashlib
+import os
+import posixpath
+import time
+from contextlib import contextmanager
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+LOCK_NAME = '.content-addressed.lock'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файл под SHA-256 его содержимого: posts/ab/ab…e3.jpg.
+
+    Одинаковые загрузки получают одно имя и один файл на диске, а sorl,
+    который строит имя миниатюры из имени исходника, — один набор
+    миниатюр. Файл удаляется, только когда на него не ссылается ни
+    один пост (posts.purge.release_images).
+
+    Сохранение и удаление идут под общей файловой блокировкой, а
+    совпавший по содержимому файл получает свежее время изменения:
+    пост, который на него сошлется, закоммитится чуть позже, и до тех
+    пор файл считается занятым (recently_saved).
+    """
+
+    @contextmanager
+    def locked(self):
+        os.makedirs(self.location, exist_ok=True)
+        with open(self.path(LOCK_NAME), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        with self.locked():
+            if self.exists(name):
+                os.utime(self.path(name))
+                return name
+            return super().save(name, content, max_length)
+
+    def recently_saved(self, name, seconds):
+        try:
+            modified = os.path.getmtime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return time.time() - modified < seconds
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(
+            posixpath.dirname(name), digest[:2], f'{digest}{extension}')
+
+
+# хранилище картинок постов; sorl строит имена миниатюр с учетом
+# хранилища исходника, поэтому задачи открывают картинку через него
+image_storage = ContentAddressedStorage()
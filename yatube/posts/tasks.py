@@ -0,0 +1,59 @@
+from django.conf import settings
+
+from core.jobs import enqueue, task
+
+from . import feed, purge, thumbnails
+from .cache import bump_versions, post_scopes
+from .models import Post
+
+
+@task('posts.fan_out_post', priority=10)
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'pk', 'author_id', 'pub_date').first()
+    if post is None:
+        return
+    follower_ids = feed.fan_out_post(post)
+    # post_saved поднял 'posts' до раскладки: страницу подписок,
+    # открытую в этом промежутке, закэшировали бы без нового поста
+    bump_versions(*(f'follow:{user_id}' for user_id in follower_ids))
+
+
+def thumbnail_ready(name):
+    """Сбрасывает страницы с постами картинки, готова ее миниатюра.
+
+    Пока миниатюры не было, страницы с такими постами закэшировались
+    с исходной картинкой: без новой версии они отдавали бы ее до
+    истечения FEED_CACHE_TIMEOUT.
+    """
+    scopes = []
+    for post in Post.objects.filter(image=name).only(
+            'pk', 'author_id', 'group_id'):
+        scopes.extend(post_scopes(post))
+    bump_versions(*scopes)
+
+
+@task('posts.generate_thumbnail', priority=-10, max_attempts=1)
+def generate_thumbnail(name, geometry, options):
+    if thumbnails.generate_thumbnail(name, geometry, options):
+        thumbnail_ready(name)
+
+
+@task('posts.pregenerate_thumbnails', priority=-10, max_attempts=1)
+def pregenerate_thumbnails(name):
+    if thumbnails.pregenerate_thumbnails(name):
+        thumbnail_ready(name)
+
+
+@task('posts.release_image', priority=-20)
+def release_image(name):
+    purge.release_images([name])
+
+
+@task('posts.purge_deleted', priority=-20)
+def purge_deleted():
+    """Удаляет не больше PURGE_JOB_BATCHES порций и ставит продолжение."""
+    batches = sum(1 for _ in purge.purge(
+        max_batches=settings.PURGE_JOB_BATCHES))
+    if batches == settings.PURGE_JOB_BATCHES:
+        enqueue('posts.purge_deleted', key='posts.purge_deleted')
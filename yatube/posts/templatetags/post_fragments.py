@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts.cache import post_fragments as cached_post_fragments
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_fragments(posts, group_link=False):
+    return [mark_safe(html)
+            for html in cached_post_fragments(posts, group_link)]
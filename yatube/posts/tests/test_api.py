@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        for i in range(12):
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author,
+                group=cls.group if i % 2 else None
+            )
+        cls.post = Post.objects.latest('pub_date', 'pk')
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get_json(self, url, client=None, **params):
+        response = (client or self.client).get(url, params)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response, response.json()
+
+    def test_feeds_paginate_with_cursor(self):
+        """Ленты API листаются курсором до конца."""
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-pk').values_list('pk', flat=True))
+        _, first = self.get_json(reverse('posts:api_posts'), fields='id')
+        self.assertEqual([post['id'] for post in first['results']],
+                         expected[:10])
+        self.assertIsNone(first['previous'])
+        _, second = self.get_json(reverse('posts:api_posts'), fields='id',
+                                  cursor=first['next'])
+        self.assertEqual([post['id'] for post in second['results']],
+                         expected[10:])
+        self.assertIsNone(second['next'])
+
+    def test_group_profile_and_follow_feeds(self):
+        """Каждая лента отдает только свои посты."""
+        reader = Client()
+        reader.force_login(self.reader)
+        feeds = {
+            reverse('posts:api_group_posts', args=[self.group.slug]): 6,
+            reverse('posts:api_profile_posts', args=[self.author]): 12,
+            reverse('posts:api_follow_posts'): 12,
+        }
+        for url, count in feeds.items():
+            with self.subTest(url=url):
+                _, data = self.get_json(url, client=reader, limit=20)
+                self.assertEqual(len(data['results']), count)
+
+    def test_fields_projection(self):
+        """fields= ограничивает и ответ, и выбираемые колонки."""
+        with CaptureQueriesContext(connection) as queries:
+            _, data = self.get_json(
+                reverse('posts:api_posts'), fields='id,author')
+        self.assertEqual(set(data['results'][0]), {'id', 'author'})
+        self.assertEqual(data['results'][0]['author'], 'Author')
+        sql = queries[-1]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertIn('"username"', sql)
+
+    def test_unknown_field(self):
+        """Неизвестное поле — ошибка 400 в JSON."""
+        response, data = self.get_json(
+            reverse('posts:api_posts'), fields='id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', data['error'])
+
+    def test_batch_lookup(self):
+        """ids= отдает посты одним запросом в порядке запроса."""
+        ids = list(Post.objects.values_list('pk', flat=True)[:3])
+        ids.reverse()
+        with self.assertNumQueries(1):
+            _, data = self.get_json(
+                reverse('posts:api_posts'),
+                ids=','.join(map(str, ids + [0])), fields='id,text')
+        self.assertEqual([post['id'] for post in data['results']], ids)
+        self.assertEqual(data['missing'], [0])
+
+    def test_post_detail(self):
+        """Пост отдается вместе с первыми комментариями."""
+        _, data = self.get_json(
+            reverse('posts:api_post_detail', args=[self.post.pk]))
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['group'], self.group.slug)
+        self.assertIsNone(data['image'])
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            ['Комментарий']
+        )
+        self.assertIsNone(data['comments_next'])
+
+    def test_errors_are_json(self):
+        """404, 401 и 405 тоже отдаются в JSON."""
+        cases = {
+            reverse('posts:api_post_detail', args=[0]): 404,
+            reverse('posts:api_group_posts', args=['missing']): 404,
+            reverse('posts:api_follow_posts'): 401,
+        }
+        for url, status in cases.items():
+            with self.subTest(url=url):
+                response, data = self.get_json(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', data)
+        response = self.client.post(reverse('posts:api_posts'))
+        self.assertEqual(response.status_code, 405)
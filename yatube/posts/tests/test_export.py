@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост, "в кавычках" {i}',
+                group=cls.group)
+            for i in range(3)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='Свой комментарий')
+        Post.objects.create(author=cls.other, text='Чужой пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse('posts:profile_export', args=[self.author])
+
+    def test_export_ndjson(self):
+        """Выгрузка NDJSON — поток с постами и комментариями автора."""
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(
+            [(row['type'], row['id']) for row in rows],
+            [('post', post.pk) for post in self.posts]
+            + [('comment', self.comment.pk)]
+        )
+        self.assertEqual(rows[0]['group'], 'group')
+        self.assertEqual(rows[-1]['post_id'], self.posts[0].pk)
+
+    def test_export_csv(self):
+        """Выгрузка CSV читается обратно тем же модулем csv."""
+        response = self.client.get(self.url, {'format': 'csv'})
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['text'], self.posts[0].text)
+        self.assertEqual(rows[3]['type'], 'comment')
+
+    def test_export_only_own_data(self):
+        """Чужую выгрузку получить нельзя, а неизвестный формат — 400."""
+        other_url = reverse('posts:profile_export', args=[self.other])
+        response = self.client.get(other_url)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=[self.other]))
+        response = self.client.get(self.url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_command(self):
+        """Команда export_posts пишет то же самое в файл."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.ndjson')
+            call_command('export_posts', 'Author', output=path,
+                         chunk_size=2)
+            with open(path, encoding='utf-8') as file:
+                rows = [json.loads(line) for line in file]
+        self.assertEqual(len(rows), 4)
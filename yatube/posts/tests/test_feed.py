@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.jobs import Worker
+from posts.models import FeedItem, Follow, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow_page(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленту подписчика."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='новый пост', author=self.author)
+        self.assertTrue(
+            FeedItem.objects.filter(user=self.reader, post=post).exists())
+        self.assertEqual(self.follow_page(), [post])
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        """Подписка подтягивает старые посты, отписка их убирает."""
+        old_post = Post.objects.create(text='старый пост', author=self.author)
+        self.reader_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.author.username}))
+        self.assertEqual(self.follow_page(), [old_post])
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}))
+        self.assertEqual(self.follow_page(), [])
+        self.assertFalse(FeedItem.objects.filter(user=self.reader).exists())
+
+    @override_settings(FEED_MAX_LENGTH=3)
+    def test_feed_is_capped(self):
+        """Лента хранит не больше FEED_MAX_LENGTH записей."""
+        posts = [Post.objects.create(text=f'пост {i}', author=self.author)
+                 for i in range(5)]
+        Follow.objects.create(user=self.reader, author=self.author)
+        feed = FeedItem.objects.filter(user=self.reader).order_by(
+            '-pub_date', '-pk').values_list('post_id', flat=True)
+        self.assertEqual(list(feed), [post.pk for post in posts[:1:-1]])
+
+    @override_settings(FEED_MAX_LENGTH=3)
+    def test_fan_out_trims_feed(self):
+        """Раскладка новых постов не растит ленту сверх FEED_MAX_LENGTH."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [Post.objects.create(text=f'пост {i}', author=self.author)
+                 for i in range(5)]
+        feed = FeedItem.objects.filter(user=self.reader).order_by(
+            '-pub_date', '-pk').values_list('post_id', flat=True)
+        self.assertEqual(list(feed), [post.pk for post in posts[:1:-1]])
+
+    @override_settings(JOBS_IMMEDIATE=False)
+    def test_fan_out_job_invalidates_follow_page(self):
+        """Страница подписок, открытая до раскладки, не остается старой."""
+        cache.clear()
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(text='ждет раскладки', author=self.author)
+        url = reverse('posts:follow_index')
+        self.assertNotContains(self.reader_client.get(url), 'ждет раскладки')
+        Worker('test').run(burst=True)
+        self.assertContains(self.reader_client.get(url), 'ждет раскладки')
+
+    def test_follow_feed_cursor_pages(self):
+        """Курсор листает ленту подписок в порядке записей ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [Post.objects.create(text=f'пост {i}', author=self.author)
+                 for i in range(12)]
+        # одинаковая дата у соседних записей: порядок решает id записи
+        FeedItem.objects.filter(post__in=posts[4:8]).update(
+            pub_date=posts[4].pub_date)
+        expected = list(FeedItem.objects.filter(user=self.reader).order_by(
+            '-pub_date', '-pk').values_list('post_id', flat=True))
+        url = reverse('posts:follow_index')
+        first = self.reader_client.get(url + '?cursor=').context['page_obj']
+        second = self.reader_client.get(
+            url + f'?cursor={first.next_cursor}').context['page_obj']
+        self.assertEqual([post.pk for post in [*first, *second]], expected)
+        self.assertFalse(second.has_next())
+        back = self.reader_client.get(
+            url + f'?cursor={second.previous_cursor}').context['page_obj']
+        self.assertEqual(list(back), list(first))
+
+    def test_rebuild_feeds_command(self):
+        """Команда rebuild_feeds восстанавливает ленту по подпискам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='пост', author=self.author)
+        FeedItem.objects.all().delete()
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertEqual(self.follow_page(), [post])
@@ -1,10 +1,16 @@
+import hashlib
 import shutil
 import tempfile
+import unittest
+from io import BytesIO
 
 from django.test import Client, override_settings, TestCase
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, features
+
+from posts.forms import PostForm
 from posts.models import Post, Group, Comment, User
 
 
@@ -41,6 +47,7 @@ class PostCreateFormTests(TestCase):
             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
             b'\x0A\x00\x3B'
         )
+        cls.image_hash = hashlib.sha256(small_gif).hexdigest()
         uploaded = SimpleUploadedFile(
             name='small.gif',
             content=small_gif,
@@ -128,7 +135,10 @@ class PostCreateFormTests(TestCase):
         post = Post.objects.get(pk=id_post)
         self.assertEqual(self.post_text_form['text'], post.text)
         self.assertEqual(self.post_text_form['group'], post.group.pk)
-        self.assertEqual(f'posts/{self.post_text_form["image"]}', post.image)
+        self.assertEqual(
+            f'posts/{self.image_hash[:2]}/{self.image_hash}.gif',
+            post.image.name
+        )
         self.assertEqual(self.user, post.author)
         self.assertEqual(response.status_code, 200)
 
@@ -199,3 +209,67 @@ class PostCreateFormTests(TestCase):
             data=form)
         changed_comment_num = Comment.objects.count()
         self.assertEqual(changed_comment_num, original_comment_num)
+
+
+def make_upload(name, size, image_format='JPEG', exif=None):
+    buffer = BytesIO()
+    options = {'exif': exif} if exif else {}
+    Image.new('RGB', size, 'blue').save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type=f'image/{image_format.lower()}')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIDE=100,
+                   POST_IMAGE_MAX_PIXELS=500 * 500)
+class PostImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def clean_image(self, upload):
+        form = PostForm(data={'text': 'текст'}, files={'image': upload})
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.cleaned_data['image']
+
+    def test_large_image_downscaled_without_metadata(self):
+        """Большая картинка уменьшается, EXIF удаляется."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        image = self.clean_image(make_upload('photo.jpg', (400, 200),
+                                             exif=exif.tobytes()))
+        result = Image.open(image)
+        self.assertEqual(result.size, (100, 50))
+        self.assertFalse(result.getexif())
+        self.assertEqual(image.name, 'photo.jpg')
+
+    def test_small_image_kept(self):
+        """Небольшая картинка без метаданных не перекодируется."""
+        upload = make_upload('small.png', (50, 50), 'PNG')
+        self.assertIs(self.clean_image(upload), upload)
+
+    @unittest.skipUnless(features.check('webp'), 'Pillow без WebP')
+    @override_settings(POST_IMAGE_WEBP=True)
+    def test_webp(self):
+        """С POST_IMAGE_WEBP картинка сохраняется в WebP."""
+        image = self.clean_image(make_upload('photo.jpg', (400, 200)))
+        self.assertEqual(image.name, 'photo.webp')
+        self.assertEqual(Image.open(image).format, 'WEBP')
+
+    def test_oversized_dimensions_rejected(self):
+        """Картинка больше POST_IMAGE_MAX_PIXELS отклоняется."""
+        form = PostForm(data={'text': 'текст'},
+                        files={'image': make_upload('huge.jpg', (600, 600))})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'image_too_large')
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_oversized_file_rejected(self):
+        """Файл больше POST_IMAGE_MAX_BYTES отклоняется."""
+        upload = make_upload('photo.jpg', (50, 50))
+        self.assertGreater(upload.size, 100)
+        form = PostForm(data={'text': 'текст'}, files={'image': upload})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'file_too_large')
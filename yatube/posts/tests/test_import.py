@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, FeedItem, Follow, Group, Post
+
+User = get_user_model()
+
+ROWS = [
+    {'type': 'post', 'id': 101, 'author': 'Author', 'group': 'group',
+     'date': '2020-01-02T10:00:00+00:00', 'text': 'Первый импортный'},
+    {'type': 'post', 'id': 102, 'author': 'Author',
+     'date': '2020-01-03T10:00:00', 'text': 'Второй импортный'},
+    {'type': 'comment', 'id': 201, 'post_id': 101, 'author': 'Reader',
+     'text': 'Комментарий'},
+    {'type': 'follow', 'user': 'Reader', 'author': 'Author'},
+    {'type': 'post', 'author': 'Nobody', 'text': 'Без автора'},
+    {'type': 'comment', 'post_id': 999, 'author': 'Reader', 'text': 'Мимо'},
+    {'type': 'like', 'author': 'Reader'},
+]
+
+
+class ImportCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'import.ndjson')
+        self.write_rows(ROWS)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write_rows(self, rows):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def run_import(self, *args, **options):
+        errors = StringIO()
+        call_command('import_posts', self.path, *args, batch_size=2,
+                     stdout=StringIO(), stderr=errors, **options)
+        return errors.getvalue()
+
+    def test_import_rows(self):
+        """Импорт создает записи и пропускает строки с ошибками."""
+        errors = self.run_import()
+        self.assertEqual(
+            sorted(Post.objects.values_list('pk', flat=True)), [101, 102])
+        post = Post.objects.get(pk=101)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertTrue(Comment.objects.filter(pk=201, post=post).exists())
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=self.author)
+            .exists())
+        for line in ('строка 5', 'строка 6', 'строка 7'):
+            self.assertIn(line, errors)
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_import_rebuilds_derived_data(self):
+        """После импорта счетчики, лента и поиск соответствуют данным."""
+        self.run_import()
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.posts_count, 2)
+        self.assertEqual(self.author.profile.following_count, 1)
+        self.assertEqual(FeedItem.objects.filter(user=self.reader).count(), 2)
+        response = Client().get(reverse('posts:search'), {'q': 'импортный'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+
+    def test_import_resumes_from_checkpoint(self):
+        """С сохраненным прогрессом импорт продолжает со следующей строки."""
+        with open(f'{self.path}.checkpoint', 'w') as file:
+            json.dump({'line': 1, 'users': [self.author.pk]}, file)
+        self.run_import()
+        self.assertEqual(
+            list(Post.objects.values_list('pk', flat=True)), [102])
+
+    def test_repeated_import_skips_existing_ids(self):
+        """Повторная загрузка не создает дублей постов и комментариев."""
+        self.run_import()
+        self.run_import()
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_import_creates_missing_references(self):
+        """С флагами создаются неизвестные авторы и группы."""
+        self.write_rows([{'type': 'post', 'author': 'Newcomer',
+                          'group': 'new-group', 'text': 'Привет'}])
+        self.run_import(create_users=True, create_groups=True)
+        post = Post.objects.get()
+        self.assertEqual(post.author.username, 'Newcomer')
+        self.assertEqual(post.group.slug, 'new-group')
+        self.assertEqual(post.author.profile.posts_count, 1)
+
+    def test_export_import_round_trip(self):
+        """Выгрузка export_posts в CSV загружается обратно."""
+        Post.objects.create(author=self.author, text='Пост\nв две строки')
+        export_path = os.path.join(self.directory, 'export.csv')
+        call_command('export_posts', 'Author', format='csv',
+                     output=export_path)
+        Post.objects.all().delete()
+        self.path = export_path
+        self.run_import()
+        self.assertEqual(Post.objects.get().text, 'Пост\nв две строки')
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, FeedItem, Follow, Post
+from users.counters import recount
+
+User = get_user_model()
+
+
+class LoadCommandsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_load', users=20, groups=3, posts=200, follows=40,
+            comments=50, batch_size=30, seed=1, stdout=StringIO()
+        )
+
+    def test_generate_load_creates_data(self):
+        """generate_load создает заданный объем данных."""
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Follow.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertGreater(
+            Post.objects.dates('pub_date', 'day').count(), 1)
+
+    def test_generate_load_fills_derived_data(self):
+        """Счетчики профилей и ленты совпадают с данными в базе."""
+        for user in User.objects.select_related('profile'):
+            counters = user.profile
+            fresh = recount(user)
+            self.assertEqual(
+                (counters.posts_count, counters.follower_count,
+                 counters.following_count),
+                (fresh.posts_count, fresh.follower_count,
+                 fresh.following_count)
+            )
+        follow = Follow.objects.first()
+        self.assertEqual(
+            FeedItem.objects.filter(user=follow.user).count(),
+            Post.objects.filter(
+                author__following__user=follow.user).count()
+        )
+
+    def test_bench_views_writes_json(self):
+        """bench_views сохраняет перцентили и число запросов."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            call_command('bench_views', requests=3, warmup=0, output=path,
+                         stdout=StringIO())
+            with open(path) as file:
+                report = json.load(file)
+        self.assertEqual(
+            set(report['views']),
+            {'index', 'index_deep', 'group_list', 'profile', 'post_detail',
+             'follow_index'}
+        )
+        for result in report['views'].values():
+            self.assertEqual(result['status'], 200)
+            self.assertTrue({'p50', 'p95', 'p99'} <= set(result))
+            self.assertIsNotNone(result['queries'])
@@ -1,7 +1,14 @@
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post
+from ..utils import COMMENT_NUM, POST_NUM
 
 User = get_user_model()
 
@@ -54,3 +61,90 @@ class GroupModelTest(TestCase):
         """Проверяем, что у моделей корректно работает __str__."""
         group = GroupModelTest.group
         self.assertEqual(str(group), group.title)
+
+
+class QueryPlanTest(TestCase):
+    """Запросы лент читают данные по индексу, без сортировки в памяти.
+
+    Планы строятся для SQL, который выполняют сами view, в режимах
+    страниц и курсора.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='plan_slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {i}')
+            for i in range(POST_NUM + 1)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.bulk_create(
+            [Comment(post=cls.post, author=cls.user, text=f'Коммент {i}')
+             for i in range(COMMENT_NUM + 1)])
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def view_plans(self, url):
+        """Планы всех SELECT, выполненных view по адресу url."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans.append('\n'.join(row[-1] for row in cursor.fetchall()))
+        return response, plans
+
+    def assertViewUsesIndex(self, url, index_name):
+        response, plans = self.view_plans(url)
+        self.assertTrue(
+            any(index_name in plan for plan in plans),
+            f'{index_name} не используется: {plans}')
+        for plan in plans:
+            self.assertNotIn('TEMP B-TREE', plan)
+        return response
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_feed_views_use_indexes(self):
+        feeds = {
+            'post_pub_date_idx': reverse('posts:index'),
+            'post_author_pub_date_idx': reverse(
+                'posts:profile', kwargs={'username': self.user.username}),
+            'post_group_pub_date_idx': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}),
+            'feed_user_pub_date_idx': reverse('posts:follow_index'),
+        }
+        for index_name, url in feeds.items():
+            with self.subTest(index_name=index_name, mode='page'):
+                self.assertViewUsesIndex(url + '?page=2', index_name)
+            with self.subTest(index_name=index_name, mode='cursor'):
+                page = self.assertViewUsesIndex(
+                    url + '?cursor=', index_name).context['page_obj']
+                page = self.assertViewUsesIndex(
+                    url + f'?cursor={page.next_cursor}',
+                    index_name).context['page_obj']
+                self.assertViewUsesIndex(
+                    url + f'?cursor={page.previous_cursor}', index_name)
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_comment_views_use_index(self):
+        comments = self.assertViewUsesIndex(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            'comment_post_created_idx').context['comments']
+        self.assertViewUsesIndex(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+            + f'?cursor={comments.next_cursor}',
+            'comment_post_created_idx')
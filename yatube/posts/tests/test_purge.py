@@ -0,0 +1,198 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Job
+from posts.models import Comment, FeedItem, Follow, Group, Post
+from posts.purge import (purge, release_images, soft_delete_posts,
+                         soft_delete_user)
+from users.models import Profile
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class SoftDeleteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Скрываемый пост')
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий читателя')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def assertHidden(self):
+        for name, kwargs in (
+            ('posts:index', {}),
+            ('posts:group_list', {'slug': self.group.slug}),
+            ('posts:search', {}),
+        ):
+            response = self.client.get(
+                reverse(name, kwargs=kwargs), {'q': 'Скрываемый'})
+            self.assertNotContains(response, 'Скрываемый пост')
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, 'Скрываемый пост')
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            reverse('posts:api_post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_soft_delete_post(self):
+        """Удаленный пост сразу пропадает отовсюду и из счетчика."""
+        soft_delete_posts([self.post])
+        self.assertHidden()
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertEqual(
+            Profile.objects.get(user=self.author).posts_count, 0)
+
+    def test_soft_delete_user(self):
+        """Удаленный пользователь скрыт вместе с постами и не входит."""
+        soft_delete_user(self.author)
+        self.assertHidden()
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'Author'}))
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNotNone(Profile.objects.get(user=self.author).deleted_at)
+        soft_delete_user(self.reader)
+        self.assertFalse(
+            Comment.objects.visible().filter(author=self.reader).exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_RELEASE_GRACE=0)
+class PurgeCommandTest(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(5)
+        ]
+        self.kept = Post.objects.create(author=self.reader, text='Остается')
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий')
+        Comment.objects.create(
+            post=self.kept, author=self.author, text='Ответ автора')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def purge(self, **options):
+        out = StringIO()
+        call_command('purge_deleted', stdout=out, **options)
+        return out.getvalue()
+
+    def test_purge_user(self):
+        """Пользователь удаляется со всем контентом порциями."""
+        soft_delete_user(self.author)
+        self.purge(batch_size=2, max_batches=2)
+        self.assertTrue(User.objects.filter(username='Author').exists())
+        self.purge(batch_size=2)
+        self.assertFalse(User.objects.filter(username='Author').exists())
+        self.assertEqual(list(Post.objects.all()), [self.kept])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(FeedItem.objects.filter(
+            post__author__username='Author').exists())
+        profile = Profile.objects.get(user=self.reader)
+        self.assertEqual(
+            (profile.posts_count, profile.follower_count,
+             profile.following_count),
+            (1, 0, 0)
+        )
+
+    def test_user_feed_purged_before_user(self):
+        """Лента удаленного пользователя удаляется порциями до него самого."""
+        self.assertTrue(FeedItem.objects.filter(user=self.author).exists())
+        soft_delete_user(self.author)
+        # остались ли записи ленты после последней порции каждого шага
+        feed_left = {
+            step: FeedItem.objects.filter(user_id=self.author.pk).exists()
+            for step, _ in purge(batch_size=2)
+        }
+        self.assertFalse(feed_left['feed items'])
+        self.assertFalse(User.objects.filter(username='Author').exists())
+
+    def test_purge_post_image(self):
+        """Вместе с удаленным постом удаляется его картинка."""
+        post = self.posts[0]
+        post.image = SimpleUploadedFile(
+            'purged.gif', SMALL_GIF, content_type='image/gif')
+        post.save()
+        name = post.image.name
+        self.assertTrue(default_storage.exists(name))
+        soft_delete_posts([post])
+        self.assertIn('posts: 1', self.purge())
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertFalse(default_storage.exists(name))
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 4)
+
+    def test_shared_image_kept_until_last_post(self):
+        """Одинаковые загрузки хранятся одним файлом до последней ссылки."""
+        first, second = self.posts[:2]
+        for post, filename in ((first, 'one.gif'), (second, 'two.gif')):
+            post.image = SimpleUploadedFile(
+                filename, SMALL_GIF, content_type='image/gif')
+            post.save()
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertEqual(len(default_storage.listdir(
+            os.path.dirname(name))[1]), 1)
+        soft_delete_posts([first])
+        self.purge()
+        self.assertTrue(default_storage.exists(name))
+        second.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF + b'\x00', content_type='image/gif')
+        second.save()
+        self.assertFalse(default_storage.exists(name))
+
+    @override_settings(POST_IMAGE_RELEASE_GRACE=60)
+    def test_recently_saved_image_kept(self):
+        """Файл, только что совпавший с загрузкой, не удаляется сразу."""
+        post = self.posts[0]
+        post.image = SimpleUploadedFile(
+            'fresh.gif', SMALL_GIF, content_type='image/gif')
+        post.save()
+        name = post.image.name
+        # новая загрузка того же содержимого еще не закоммичена
+        Post.objects.filter(pk=post.pk).update(image='')
+        release_images([name])
+        self.assertTrue(default_storage.exists(name))
+        job = Job.objects.get(task='posts.release_image')
+        self.assertEqual(json.loads(job.args), [name])
+        self.assertGreater(job.run_at, timezone.now())
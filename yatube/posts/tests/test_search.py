@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Котики котики и ещё раз котики')
+        cls.dogs = Post.objects.create(
+            author=cls.author, text='Собаки тоже бывают, а котики лучше')
+        cls.other = Post.objects.create(
+            author=cls.author, text='Про погоду', group=cls.group)
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query, **params):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def found(self, query):
+        return list(self.search(query).context['page_obj'])
+
+    def test_search_ranks_matches(self):
+        """Поиск находит посты и ставит выше самые релевантные."""
+        self.assertEqual(self.found('котики'), [self.cats, self.dogs])
+        self.assertEqual(self.found('собаки котики'), [self.dogs])
+        self.assertEqual(self.found('кошки'), [])
+
+    def test_search_matches_prefixes(self):
+        """Слово ищется и как начало более длинных слов."""
+        self.assertEqual(self.found('погод'), [self.other])
+
+    def test_search_index_follows_changes(self):
+        """Правка и удаление поста сразу видны в поиске."""
+        post = Post.objects.get(pk=self.other.pk)
+        post.text = 'Про котиков в дождь'
+        post.save()
+        self.assertEqual(self.found('погоду'), [])
+        self.assertIn(post, self.found('дождь'))
+        post.delete()
+        self.assertEqual(self.found('дождь'), [])
+
+    def test_search_index_sees_bulk_create(self):
+        """Посты из bulk_create тоже попадают в индекс."""
+        Post.objects.bulk_create(
+            [Post(author=self.author, text='Массовая загрузка')])
+        self.assertEqual(len(self.found('массовая')), 1)
+
+    def test_search_highlights_and_escapes(self):
+        """Совпадения подсвечиваются, а HTML из поста экранируется."""
+        Post.objects.create(
+            author=self.author, text='<script>alert(1)</script> ёжик')
+        response = self.search('ёжик')
+        content = response.content.decode()
+        self.assertIn('<mark>ёжик</mark>', content)
+        self.assertNotIn('<script>alert', content)
+
+    def test_search_paginates_with_query(self):
+        """Ссылки пагинатора сохраняют поисковый запрос."""
+        Post.objects.bulk_create(
+            [Post(author=self.author, text=f'Птички {i}') for i in range(12)])
+        response = self.search('птички')
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 12)
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(response, '?q=%D0%BF%D1%82%D0%B8%D1%87%D0%BA%D0%B8'
+                                      '&amp;page=2')
+        page = self.search('птички', page=2).context['page_obj']
+        self.assertEqual(len(page), 2)
+
+    def test_empty_query_shows_form(self):
+        """Пустой запрос показывает только форму."""
+        self.assertIsNone(self.search('  ').context['page_obj'])
+
+    @override_settings(POSTS_SEARCH_FTS=False)
+    def test_fallback_search(self):
+        """Без индекса поиск работает через LIKE с той же подсветкой."""
+        self.assertEqual(set(self.found('котики')), {self.cats, self.dogs})
+        self.assertContains(self.search('погоду'), '<mark>погоду</mark>')
+
+    def test_rebuild_search_index(self):
+        """Команда возвращает триггеры, пропавшие при пересоздании таблицы."""
+        with connection.cursor() as cursor:
+            for trigger in search.TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {trigger}')
+        Post.objects.create(author=self.author, text='Без индекса')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found('погоду'), [self.other])
+        self.assertEqual(len(self.found('индекса')), 1)
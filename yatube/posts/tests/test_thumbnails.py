@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from core.models import Job
+from posts.models import Post
+from posts.thumbnails import generate_thumbnail, pregenerate_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_ASYNC=True)
+class AsyncThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        buffer = BytesIO()
+        Image.new('RGB', (100, 50), 'red').save(buffer, 'JPEG')
+        # задача на миниатюры остается в очереди, а не выполняется сразу
+        with override_settings(JOBS_IMMEDIATE=False):
+            cls.post = Post.objects.create(
+                text='пост с картинкой',
+                author=cls.user,
+                image=SimpleUploadedFile('red.jpg', buffer.getvalue(),
+                                         content_type='image/jpeg')
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_missing_thumbnail_is_scheduled(self):
+        """Без готовой миниатюры отдается оригинал, а миниатюра заказана."""
+        with mock.patch('posts.thumbnails.schedule_thumbnail') as schedule:
+            image = get_thumbnail(self.post.image, '960x339', crop='center')
+        self.assertEqual(image.name, self.post.image.name)
+        schedule.assert_called_once_with(
+            self.post.image.name, '960x339', {'crop': 'center'}, mock.ANY)
+
+    @override_settings(JOBS_IMMEDIATE=False)
+    def test_thumbnail_job_deduplicated_by_queue(self):
+        """Ждущая миниатюра ставится один раз, упавшая — заново."""
+        jobs = Job.objects.filter(task='posts.generate_thumbnail')
+        for _ in range(2):
+            get_thumbnail(self.post.image, '80x80')
+        self.assertEqual(jobs.count(), 1)
+        jobs.update(status=Job.FAILED)
+        get_thumbnail(self.post.image, '80x80')
+        self.assertEqual(jobs.filter(status=Job.QUEUED).count(), 1)
+
+    @override_settings(THUMBNAIL_ASYNC=False)
+    def test_pregenerated_thumbnail_is_served(self):
+        """Заранее созданная миниатюра отдается без повторной генерации."""
+        pregenerate_thumbnails(self.post.image.name)
+        with self.settings(THUMBNAIL_ASYNC=True), mock.patch(
+                'posts.thumbnails.schedule_thumbnail') as schedule:
+            image = get_thumbnail(
+                self.post.image, '960x339', crop='center', upscale=True)
+        schedule.assert_not_called()
+        self.assertNotEqual(image.name, self.post.image.name)
+        self.assertEqual((image.width, image.height), (960, 339))
+
+    def test_background_file_is_picked_up(self):
+        """Файл, созданный фоновой задачей, подхватывается при рендере."""
+        generate_thumbnail(self.post.image.name, '100x100', {})
+        with mock.patch('posts.thumbnails.schedule_thumbnail') as schedule:
+            image = get_thumbnail(self.post.image, '100x100')
+        schedule.assert_not_called()
+        self.assertNotEqual(image.name, self.post.image.name)
+        self.assertEqual(image.width, 100)
+
+    def test_new_image_triggers_pregeneration(self):
+        """Сохранение новой картинки ставит задачу на миниатюры."""
+        post = Post.objects.get(pk=self.post.pk)
+        with mock.patch('posts.signals.enqueue') as enqueue:
+            post.text = 'без смены картинки'
+            post.save()
+            enqueue.assert_not_called()
+            post.image = SimpleUploadedFile(
+                'other.gif', b'GIF89a', content_type='image/gif')
+            post.save()
+        enqueue.assert_any_call(
+            'posts.pregenerate_thumbnails', post.image.name)
+        # старая картинка освобождается: файл удалится без ссылок
+        enqueue.assert_any_call('posts.release_image', self.post.image.name)
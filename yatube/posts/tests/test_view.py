@@ -1,10 +1,17 @@
+import shutil
+import tempfile
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django import forms
-import time
 
-from posts.models import Post, Group, Follow
+from core.jobs import Worker
+from posts.models import Comment, Post, Group, Follow
 from django.core.cache import cache
 
 
@@ -57,6 +64,114 @@ class PaginatorViewsTest(TestCase):
                             response.context['page_obj']), page_count)
 
 
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='User')
+        cls.group = Group.objects.create(
+            title='группа',
+            slug='group_slug',
+            description='описание'
+        )
+        Post.objects.bulk_create(
+            [Post(
+                text=f'Пост номер {i}',
+                author=cls.user,
+                group=cls.group,
+            ) for i in range(13)]
+        )
+
+    def test_cursor_paginator(self):
+        """Курсорная пагинация листает ленту вперед и назад."""
+        url_names = {
+            'posts:index': {},
+            'posts:group_list': {'slug': self.group.slug},
+            'posts:profile': {'username': self.user},
+        }
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-pk').values_list('pk', flat=True))
+        for url_name, url_kwargs in url_names.items():
+            with self.subTest(url_name=url_name):
+                url = reverse(url_name, kwargs=url_kwargs)
+                first = self.client.get(url + '?cursor=').context['page_obj']
+                self.assertEqual([post.pk for post in first], expected[:10])
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    url + f'?cursor={first.next_cursor}'
+                ).context['page_obj']
+                self.assertEqual([post.pk for post in second], expected[10:])
+                self.assertFalse(second.has_next())
+                back = self.client.get(
+                    url + f'?cursor={second.previous_cursor}'
+                ).context['page_obj']
+                self.assertEqual([post.pk for post in back], expected[:10])
+                self.assertFalse(back.has_previous())
+
+    def test_cursor_paginator_bad_cursor(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.client.get(reverse('posts:index') + '?cursor=%%%')
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='пост', author=cls.author)
+        Comment.objects.bulk_create(
+            [Comment(post=cls.post, author=cls.author, text=f'Коммент {i}')
+             for i in range(25)]
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.expected = list(self.post.comments.order_by(
+            '-created', '-pk').values_list('pk', flat=True))
+
+    def test_post_detail_shows_first_comments(self):
+        """На странице поста только первая порция комментариев."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        comments = response.context['comments']
+        self.assertEqual([comment.pk for comment in comments],
+                         self.expected[:20])
+        self.assertContains(
+            response,
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id})
+            + f'?cursor={comments.next_cursor}'
+        )
+
+    def test_comments_fragment_returns_next_batch(self):
+        """Фрагмент отдает следующую порцию без остальной страницы."""
+        first = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )).context['comments']
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.id})
+        with self.assertNumQueries(2):
+            response = self.client.get(url + f'?cursor={first.next_cursor}')
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        comments = response.context['comments']
+        self.assertEqual([comment.pk for comment in comments],
+                         self.expected[20:])
+        self.assertFalse(comments.has_next())
+        self.assertNotContains(response, 'data-fragment')
+
+    def test_comments_fragment_hidden_post(self):
+        """Комментарии скрытого и несуществующего поста отдают 404."""
+        hidden = Post.objects.create(
+            text='скрытый', author=self.author, is_deleted=True)
+        Comment.objects.create(
+            post=hidden, author=self.author, text='Секретный коммент')
+        for post_id in (hidden.pk, hidden.pk + 1000):
+            with self.subTest(post_id=post_id):
+                response = self.client.get(reverse(
+                    'posts:post_comments', kwargs={'post_id': post_id}))
+                self.assertEqual(response.status_code, 404)
+
+
 class PostPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -74,6 +189,7 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(username='Non_author')
 
         self.authorized_client = Client()
@@ -149,7 +265,6 @@ class PostPagesTests(TestCase):
 
     def test_post_on_index(self):
         """Пост повявляется на главной странице"""
-        time.sleep(20)  # добавил из-за того, что теперь index кэшируется
         response = self.client.get(reverse('posts:index'))
         self.assertContains(response, self.post.text)
 
@@ -180,16 +295,51 @@ class PostPagesTests(TestCase):
     def test_index_cache(self):
         """Тестируем кэш"""
         cache_data = self.client.get(reverse('posts:index')).content
-        Post.objects.create(
-            text='кэшируем',
-            author=self.user
-        )
+        # update() не шлет сигналов, поэтому версия ленты не меняется
+        Post.objects.filter(pk=self.post.pk).update(text='кэшируем')
         start_cache = self.client.get(reverse('posts:index')).content
         self.assertEqual(cache_data, start_cache)
         cache.clear()
         end_cache = self.client.get(reverse('posts:index')).content
         self.assertNotEqual(cache_data, end_cache)
 
+    def test_index_cache_invalidated_on_create(self):
+        """Новый пост сразу сбрасывает кэш главной страницы"""
+        self.client.get(reverse('posts:index'))
+        Post.objects.create(
+            text='кэшируем',
+            author=self.user
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'кэшируем')
+
+    def test_group_cache_invalidated_on_edit(self):
+        """Смена группы при редактировании сбрасывает кэш обеих групп"""
+        new_group = Group.objects.create(
+            title='новая группа',
+            slug='new_slug',
+            description='описание'
+        )
+        old_url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        new_url = reverse('posts:group_list', kwargs={'slug': new_group.slug})
+        self.assertContains(self.client.get(old_url), self.post.text)
+        self.assertNotContains(self.client.get(new_url), self.post.text)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': self.post.text, 'group': new_group.pk}
+        )
+        self.assertNotContains(self.client.get(old_url), self.post.text)
+        self.assertContains(self.client.get(new_url), self.post.text)
+
+    def test_profile_cache_invalidated_on_delete(self):
+        """Удаление поста сбрасывает кэш профиля автора"""
+        post = Post.objects.create(text='удаляемый пост', author=self.author)
+        url = reverse('posts:profile',
+                      kwargs={'username': self.author.username})
+        self.assertContains(self.client.get(url), post.text)
+        post.delete()
+        self.assertNotContains(self.client.get(url), post.text)
+
     def test_follow_auth_user(self):
         """Проверяем возможность подписки на автора"""
         start_follower_num = Follow.objects.count()
@@ -212,3 +362,224 @@ class PostPagesTests(TestCase):
         follow = Follow.objects.filter(
             user=self.other_user, author=self.other_user)
         self.assertFalse(follow)
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True, MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryCountTest(TestCase):
+    """Число запросов страницы не зависит от числа постов и комментариев."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='группа',
+            slug='group_slug',
+            description='описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def add_posts(self, count, images=False):
+        for i in range(count):
+            # разные байты после конца GIF — разные файлы и миниатюры
+            image = SimpleUploadedFile(
+                f'{i}.gif', SMALL_GIF + bytes([i]),
+                content_type='image/gif') if images else None
+            post = Post.objects.create(
+                text=f'Пост {i}', author=self.author, group=self.group,
+                image=image)
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Комментарий {i}')
+        return post
+
+    def test_queries_do_not_grow_with_content(self, images=False):
+        """Ленты и пост укладываются в бюджет при любом объеме данных."""
+        urls = {
+            'posts:index': {},
+            'posts:group_list': {'slug': self.group.slug},
+            'posts:profile': {'username': self.author.username},
+            'posts:follow_index': {},
+        }
+        counts = {}
+        for posts_num in (1, 12):
+            post = self.add_posts(posts_num, images)
+            urls['posts:post_detail'] = {'post_id': post.id}
+            for url_name, kwargs in urls.items():
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    self.reader_client.get(reverse(url_name, kwargs=kwargs))
+                counts.setdefault(url_name, []).append(len(queries))
+        for url_name, (few, many) in counts.items():
+            with self.subTest(url_name=url_name):
+                self.assertEqual(few, many)
+
+    def test_image_queries_do_not_grow_with_content(self):
+        """Записи sorl о миниатюрах читаются одним запросом на страницу."""
+        self.test_queries_do_not_grow_with_content(images=True)
+
+    def test_post_detail_queries(self):
+        """Комментарии загружаются вместе с авторами."""
+        post = self.add_posts(5)
+        with self.assertNumQueries(4):
+            self.reader_client.get(
+                reverse('posts:post_detail', kwargs={'post_id': post.id}))
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='группа',
+            slug='group_slug',
+            description='описание'
+        )
+        cls.post = Post.objects.create(
+            text='пост', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        ]
+
+    def get_etags(self):
+        return {url: self.client.get(url)['ETag'] for url in self.urls}
+
+    def test_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без рендера"""
+        for url, etag in self.get_etags().items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(1 if 'group' in url
+                                           or 'profile' in url else 0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_etag(self):
+        """Новый пост меняет ETag всех страниц, где он появится"""
+        etags = self.get_etags()
+        Post.objects.create(text='новый', author=self.author, group=self.group)
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_post_etag(self):
+        """Новый комментарий меняет ETag страницы поста"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.author, text='к')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_gets_own_etag(self):
+        """Гость и авторизованный пользователь не делят ETag"""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class PostFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(
+            text='исходный текст', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_fragment_shared_between_feeds(self):
+        """Карточка, отрендеренная на главной, берется из кэша в профиле."""
+        self.client.get(reverse('posts:index'))
+        with self.assertTemplateNotUsed('posts/includes/post.html'):
+            response = self.client.get(reverse(
+                'posts:profile', kwargs={'username': self.author.username}))
+        self.assertContains(response, 'исходный текст')
+
+    def test_edit_invalidates_fragment(self):
+        """После правки поста в лентах новый текст."""
+        self.client.get(reverse('posts:index'))
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'исправленный текст'}
+        )
+        response = self.client.get(reverse(
+            'posts:profile', kwargs={'username': self.author.username}))
+        self.assertContains(response, 'исправленный текст')
+        self.assertNotContains(response, 'исходный текст')
+
+    def test_author_rename_invalidates_fragment(self):
+        """Новое имя автора сразу видно в карточках."""
+        self.client.get(reverse('posts:index'))
+        self.author.first_name = 'Новое'
+        self.author.last_name = 'Имя'
+        self.author.save()
+        self.assertContains(self.client.get(reverse('posts:index')),
+                            'Новое Имя')
+
+    def test_group_slug_change_invalidates_fragment(self):
+        """Ссылка на группу в карточке следует за сменой slug."""
+        group = Group.objects.create(
+            title='группа', slug='old_slug', description='описание')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        self.client.get(reverse('posts:index'))
+        group.slug = 'new_slug'
+        group.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, reverse(
+            'posts:group_list', kwargs={'slug': 'new_slug'}))
+
+    @override_settings(THUMBNAIL_ASYNC=True, JOBS_IMMEDIATE=False,
+                       MEDIA_ROOT=TEMP_MEDIA_ROOT)
+    def test_fallback_card_not_cached(self):
+        """Страница с картинкой вместо миниатюры обновляется после задачи."""
+        post = Post.objects.create(
+            text='с картинкой', author=self.author,
+            image=SimpleUploadedFile('card.gif', SMALL_GIF,
+                                     content_type='image/gif'))
+        original = f'src="{post.image.url}"'
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, original)
+        Worker('test').run(burst=True)
+        with self.assertTemplateUsed('posts/includes/post.html'):
+            updated = self.client.get(reverse('posts:index'))
+        self.assertNotContains(updated, original)
+        self.assertContains(updated, f'src="{settings.MEDIA_URL}cache/')
+        self.assertNotEqual(updated['ETag'], response['ETag'])
@@ -0,0 +1,171 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE, KVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.jobs import enqueue
+
+from .storage import image_storage
+
+logger = logging.getLogger(__name__)
+
+# куда AsyncThumbnailBackend записывает картинки, отданные без миниатюры
+_fallbacks = ContextVar('thumbnail_fallbacks', default=None)
+
+
+@contextmanager
+def recording_fallbacks():
+    """Собирает имена картинок, отданных вместо миниатюр внутри блока."""
+    fallbacks = []
+    token = _fallbacks.set(fallbacks)
+    try:
+        yield fallbacks
+    finally:
+        _fallbacks.reset(token)
+
+
+def generate_thumbnail(name, geometry, options):
+    """Создает миниатюру; True, если в хранилище sorl появилась запись."""
+    try:
+        return default.backend.render_thumbnail(
+            ImageFile(name, image_storage), geometry, options)
+    except Exception as error:
+        logger.warning('Не удалось создать миниатюру %s %s: %s',
+                       name, geometry, error)
+        return False
+
+
+def schedule_thumbnail(name, geometry, options, key):
+    """Ставит миниатюру в очередь задач, если она еще не ждет там.
+
+    key — ключ миниатюры в sorl: пока задача с ним в очереди, страницы
+    с картинкой не ставят ее повторно, а упавшую задачу следующий
+    рендер поставит заново.
+    """
+    enqueue('posts.generate_thumbnail', name, geometry, dict(options),
+            key=f'thumbnail:{key}')
+
+
+def prefetch_thumbnails(files):
+    """Читает записи sorl о миниатюрах картинок одним запросом.
+
+    cached_db_kvstore идет в БД за каждой записью, которой нет в кэше
+    процесса: страница из десяти карточек — десять запросов. Найденные
+    записи кладутся в кэш, где их застанет {% thumbnail %}, а отсутствие
+    записи кэшируется так же, как это делает сам sorl.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, KVStore):
+        return
+    keys = []
+    for file_ in files:
+        source = ImageFile(file_)
+        for geometry, options in settings.POST_THUMBNAIL_SIZES:
+            thumbnail = default.backend.get_thumbnail_file(
+                source, geometry, options)
+            keys.append(add_prefix(thumbnail.key))
+    if not keys:
+        return
+    missing = set(keys) - kvstore.cache.get_many(keys).keys()
+    if missing:
+        values = dict.fromkeys(missing, EMPTY_VALUE)
+        values.update(KVStoreModel.objects.filter(
+            key__in=missing).values_list('key', 'value'))
+        kvstore.cache.set_many(
+            values, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+
+
+def pregenerate_thumbnails(name):
+    """Создает все размеры из POST_THUMBNAIL_SIZES для картинки поста."""
+    created = [generate_thumbnail(name, geometry, options)
+               for geometry, options in settings.POST_THUMBNAIL_SIZES]
+    return any(created)
+
+
+class AsyncThumbnailBackend(ThumbnailBackend):
+    """Не создает миниатюру внутри запроса пользователя.
+
+    Если миниатюры еще нет в key-value хранилище sorl, она заказывается
+    в очереди фоновых задач, а шаблон получает исходную картинку.
+    Задача создает файл и сама записывает его в хранилище, так что
+    рендер страницы только читает.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not settings.THUMBNAIL_ASYNC:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+        thumbnail = self.get_thumbnail_file(source, geometry_string, options)
+        cached = default.kvstore.get(thumbnail)
+        if cached:
+            return cached
+        if thumbnail.exists():
+            # файл уже создан, но этот процесс закэшировал отсутствие
+            # записи до того, как ее сделала задача: обновляем запись
+            # здесь, один раз на процесс
+            return super().get_thumbnail(file_, geometry_string, **options)
+        schedule_thumbnail(
+            source.name, geometry_string, options, thumbnail.key)
+        fallbacks = _fallbacks.get()
+        if fallbacks is not None:
+            fallbacks.append(source.name)
+        return source
+
+    def render_thumbnail(self, file_, geometry_string, options):
+        """Создает файл миниатюры и записывает его в хранилище sorl.
+
+        Возвращает False, если запись уже была.
+        """
+        source = ImageFile(file_)
+        options = self.get_options(source, options)
+        thumbnail = ImageFile(
+            self._get_thumbnail_filename(source, geometry_string, options),
+            default.storage
+        )
+        if default.kvstore.get(thumbnail):
+            return False
+        if not thumbnail.exists():
+            source_image = default.engine.get_image(source)
+            options['image_info'] = default.engine.get_image_info(
+                source_image)
+            source.set_size(default.engine.get_image_size(source_image))
+            try:
+                self._create_thumbnail(
+                    source_image, geometry_string, options, thumbnail)
+                self._create_alternative_resolutions(
+                    source_image, geometry_string, options, thumbnail.name)
+            finally:
+                default.engine.cleanup(source_image)
+        default.kvstore.get_or_set(source)
+        default.kvstore.set(thumbnail, source)
+        return True
+
+    def get_thumbnail_file(self, source, geometry_string, options):
+        options = self.get_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_options(self, source, options):
+        # повторяет подстановку опций из ThumbnailBackend.get_thumbnail,
+        # чтобы имя миниатюры совпало с тем, что создаст sorl
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
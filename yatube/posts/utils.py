@@ -1,11 +1,170 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator
+from django.db.models import Q
 
 
 POST_NUM = 10
+COMMENT_NUM = 20
+CURSOR_PARAM = 'cursor'
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации.
+
+    В отличие от Page не знает ни номера страницы, ни общего числа
+    объектов: только ссылки на соседние страницы.
+    """
+    cursor_mode = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage {self.previous_cursor}:{self.next_cursor}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по паре (field, pk_field) в порядке убывания.
+
+    Вместо OFFSET и COUNT(*) каждая страница выбирается условием
+    «строго раньше последней показанной записи», поэтому стоимость
+    запроса не зависит от глубины страницы. Пара должна совпадать с
+    индексом, иначе база сортирует всю выборку.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date',
+                 pk_field='pk'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.field = field
+        self.pk_field = pk_field
+
+    def encode_cursor(self, direction, obj):
+        value = getattr(obj, self.field).isoformat()
+        pk = getattr(obj, self.pk_field)
+        raw = f'{direction}|{value}|{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает (direction, value, pk) или None для первой страницы."""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+            direction, value, pk = raw.split('|')
+            if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+                return None
+            return direction, datetime.fromisoformat(value), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+
+    def get_queryset(self, position):
+        """Упорядоченная выборка страницы после позиции курсора."""
+        field, pk_field = self.field, self.pk_field
+        if position is None:
+            return self.object_list.order_by(f'-{field}', f'-{pk_field}')
+        direction, value, pk = position
+        if direction == CURSOR_NEXT:
+            return self.object_list.filter(
+                Q(**{f'{field}__lt': value})
+                | Q(**{field: value, f'{pk_field}__lt': pk})
+            ).order_by(f'-{field}', f'-{pk_field}')
+        return self.object_list.filter(
+            Q(**{f'{field}__gt': value})
+            | Q(**{field: value, f'{pk_field}__gt': pk})
+        ).order_by(field, pk_field)
+
+    def get_page(self, cursor=None):
+        position = self.decode_cursor(cursor)
+        direction = CURSOR_NEXT if position is None else position[0]
+        queryset = self.get_queryset(position)
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == CURSOR_PREVIOUS:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows)
+
+        if direction == CURSOR_NEXT:
+            next_cursor = (self.encode_cursor(CURSOR_NEXT, rows[-1])
+                           if has_more else None)
+            previous_cursor = (self.encode_cursor(CURSOR_PREVIOUS, rows[0])
+                               if position is not None else None)
+        else:
+            next_cursor = self.encode_cursor(CURSOR_NEXT, rows[-1])
+            previous_cursor = (self.encode_cursor(CURSOR_PREVIOUS, rows[0])
+                               if has_more else None)
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+
+def get_cursor_page(request, post_list, items_per_page=POST_NUM,
+                    field='pub_date', pk_field='pk'):
+    paginator = CursorPaginator(post_list, items_per_page, field, pk_field)
+    return paginator.get_page(request.GET.get(CURSOR_PARAM))
+
+
+class CountedPaginator(Paginator):
+    """Paginator с заранее известным числом объектов, без COUNT(*).
+
+    Число берется из денормализованного счетчика и может отставать,
+    поэтому от него зависят только ссылки на страницы: содержимое
+    страницы выбирается срезом без оглядки на count.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
 
 
-def get_page_paginator(request, post_list, items_per_page=POST_NUM):
-    paginator = Paginator(post_list, items_per_page)
+def get_page_paginator(request, post_list, items_per_page=POST_NUM,
+                       count=None, field='pub_date', pk_field='pk'):
+    if settings.POSTS_CURSOR_PAGINATION or CURSOR_PARAM in request.GET:
+        return get_cursor_page(
+            request, post_list, items_per_page, field, pk_field)
+    if count is None:
+        paginator = Paginator(post_list, items_per_page)
+    else:
+        paginator = CountedPaginator(post_list, items_per_page, count)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
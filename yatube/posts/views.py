@@ -1,58 +1,130 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from .models import Follow, Post, Group, User
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
+from core.decorators import query_budget
+from users.counters import get_profile
+from .models import Comment, Follow, Post, Group, User
+from .cache import feed_cache, versions_etag
+from .export import FORMATS, export_rows
+from .feed import FEED_CURSOR, get_feed
+from .search import search_posts
 from .forms import PostForm, CommentForm
-from .utils import get_page_paginator
+from .utils import (COMMENT_NUM, POST_NUM, get_cursor_page,
+                    get_page_paginator)
 
 
+def index_etag(request):
+    return versions_etag(request, 'posts')
+
+
+def group_etag(request, slug):
+    group_id = Group.objects.filter(
+        slug=slug).values_list('pk', flat=True).first()
+    return versions_etag(request, f'group:{group_id}')
+
+
+def profile_etag(request, username):
+    author_id = User.objects.filter(
+        username=username).values_list('pk', flat=True).first()
+    return versions_etag(request, f'author:{author_id}',
+                         f'follow:{author_id}', f'followers:{author_id}')
+
+
+def post_detail_etag(request, post_id):
+    # 'posts' сбрасывается любым постом, в том числе и счетчик постов автора
+    return versions_etag(request, 'posts', f'comments:{post_id}')
+
+
+@condition(etag_func=index_etag)
+@query_budget(5)
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_feed()
     context = {
         'page_obj': get_page_paginator(request, post_list),
+        'feed_cache': feed_cache(request, 'posts'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=group_etag)
+@query_budget(6)
 def group_post(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.for_feed()
     context = {
         'group': group,
         'page_obj': get_page_paginator(request, post_list),
+        'feed_cache': feed_cache(request, f'group:{group.pk}'),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=profile_etag)
+@query_budget(7)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    post_count = post_list.count()
+    author = get_object_or_404(
+        User.objects.select_related('profile'),
+        username=username, is_active=True
+    )
+    post_list = author.posts.for_feed()
+    counters = get_profile(author)
     follow = (request.user != author
               and request.user.is_authenticated
               and Follow.objects.filter(
                   user=request.user, author=author).exists())
     context = {
         'author': author,
-        'post_count': post_count,
-        'page_obj': get_page_paginator(request, post_list),
+        'counters': counters,
+        'post_count': counters.posts_count,
+        'page_obj': get_page_paginator(
+            request, post_list, count=counters.posts_count),
+        'feed_cache': feed_cache(request, f'author:{author.pk}'),
         'following': follow
     }
     return render(request, 'posts/profile.html', context)
 
 
+def comments_etag(request, post_id):
+    return versions_etag(request, f'comments:{post_id}')
+
+
+@condition(etag_func=post_detail_etag)
+@query_budget(5)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.for_detail(), id=post_id)
 
-    comments = post.comments.all()
+    comments = get_cursor_page(
+        request, post.comments.for_detail(), COMMENT_NUM, field='created')
     form = CommentForm()
     context = {
         'post': post,
+        'post_count': get_profile(post.author).posts_count,
         'form': form,
         'comments': comments
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@condition(etag_func=comments_etag)
+@query_budget(3)
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста HTML-фрагментом."""
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
+    comments = get_cursor_page(
+        request, Comment.objects.for_detail().filter(post=post),
+        COMMENT_NUM, field='created'
+    )
+    context = {
+        'post_id': post.pk,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -62,7 +134,8 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
         return redirect('posts:profile', username=request.user.username)
     context = {'form': form, 'is_edit': False}
     return render(request, 'posts/post_create.html', context)
@@ -70,7 +143,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
 
@@ -93,7 +166,7 @@ def post_edit(request, post_id):
 @login_required
 def add_comment(request, post_id):
     # Получите пост и сохраните его в переменную post.
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -104,23 +177,65 @@ def add_comment(request, post_id):
 
 
 @login_required
+@query_budget(5)
 def follow_index(request):
-    posts = Post.objects.select_related(
-        'author').filter(author__following__user=request.user)
-    context = {'page_obj': get_page_paginator(request, posts)}
+    posts = get_feed(request.user)
+    context = {
+        'page_obj': get_page_paginator(request, posts, **FEED_CURSOR),
+        'feed_cache': feed_cache(
+            request, 'posts', f'follow:{request.user.pk}'),
+    }
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(5)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results = search_posts(query)
+    page_obj = None
+    if results is not None:
+        # у результатов поиска свой порядок, курсор по дате к ним не подходит
+        paginator = Paginator(results, POST_NUM)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
-def profile_follow(request, username):
+def profile_export(request, username):
+    """Все посты и комментарии пользователя одним потоком NDJSON/CSV."""
     author = get_object_or_404(User, username=username)
+    if author != request.user and not request.user.is_staff:
+        return redirect('posts:profile', username=username)
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+    lines, content_type, extension = FORMATS[export_format]
+    response = StreamingHttpResponse(
+        lines(export_rows(author)),
+        content_type=f'{content_type}; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}.{extension}"')
+    return response
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username, is_active=True)
     if author.id != request.user.id:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    Follow.objects.filter(
-        author__username=username, user=request.user).delete()
+    with transaction.atomic():
+        Follow.objects.filter(
+            author__username=username, user=request.user).delete()
     return redirect('posts:profile', username=username)
@@ -0,0 +1,36 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.purge import soft_delete_user
+
+from .models import Profile
+
+User = get_user_model()
+
+
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'posts_count', 'follower_count',
+                    'following_count', 'deleted_at')
+    search_fields = ('user__username',)
+    list_filter = ('deleted_at',)
+    readonly_fields = ('posts_count', 'follower_count', 'following_count',
+                       'deleted_at')
+
+
+class SoftDeleteUserAdmin(UserAdmin):
+    actions = ('soft_delete',)
+
+    def has_delete_permission(self, request, obj=None):
+        # каскад по постам, подпискам и лентам выполняет purge_deleted
+        return False
+
+    def soft_delete(self, request, queryset):
+        for user in queryset:
+            soft_delete_user(user)
+    soft_delete.short_description = 'Удалить выбранных пользователей'
+
+
+admin.site.register(Profile, ProfileAdmin)
+admin.site.unregister(User)
+admin.site.register(User, SoftDeleteUserAdmin)
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Profile(models.Model):
+    """Денормализованные счетчики пользователя для страницы профиля."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        'Количество постов', default=0)
+    # имена повторяют related_name модели Follow:
+    # user.follower — подписки пользователя, user.following — его подписчики
+    follower_count = models.PositiveIntegerField(
+        'Количество подписок', default=0)
+    following_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0)
+    # пользователь удален мягко: он деактивирован, контент скрыт,
+    # а удалять строки будет purge_deleted
+    deleted_at = models.DateTimeField(
+        'Удален', null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return f'{self.user}'
@@ -0,0 +1,84 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post
+from users.counters import recount_many
+from users.models import Profile
+
+User = get_user_model()
+
+
+class ProfileCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_profile_created_with_user(self):
+        """Профиль со счетчиками создается вместе с пользователем."""
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+
+    def test_posts_counter(self):
+        """Счетчик постов меняется при создании и удалении поста."""
+        post = Post.objects.create(text='пост', author=self.author)
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+        post.delete()
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счетчики обеих сторон."""
+        follow_url = reverse('posts:profile_follow',
+                             kwargs={'username': self.author.username})
+        unfollow_url = reverse('posts:profile_unfollow',
+                               kwargs={'username': self.author.username})
+        self.reader_client.get(follow_url)
+        self.assertEqual(self.profile(self.reader).follower_count, 1)
+        self.assertEqual(self.profile(self.author).following_count, 1)
+        self.reader_client.get(unfollow_url)
+        self.assertEqual(self.profile(self.reader).follower_count, 0)
+        self.assertEqual(self.profile(self.author).following_count, 0)
+
+    def test_recount_command(self):
+        """Команда recount исправляет расхождение счетчиков."""
+        Post.objects.create(text='пост', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        Profile.objects.update(
+            posts_count=10, follower_count=10, following_count=10)
+        call_command('recount', stdout=StringIO())
+        author = self.profile(self.author)
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(author.follower_count, 0)
+        self.assertEqual(author.following_count, 1)
+        self.assertEqual(self.profile(self.reader).follower_count, 1)
+
+    def test_recount_many(self):
+        """recount_many пересчитывает счетчики и создает пропавшие профили."""
+        Post.objects.bulk_create(
+            [Post(text=f'пост {i}', author=self.author) for i in range(3)])
+        Follow.objects.bulk_create(
+            [Follow(user=self.reader, author=self.author)])
+        Profile.objects.filter(user=self.reader).delete()
+        recount_many([self.author.pk, self.reader.pk])
+        self.assertEqual(self.profile(self.author).posts_count, 3)
+        self.assertEqual(self.profile(self.author).following_count, 1)
+        self.assertEqual(self.profile(self.reader).follower_count, 1)
+
+    def test_profile_page_uses_counters(self):
+        """Страница профиля показывает значения из счетчиков."""
+        Post.objects.create(text='пост', author=self.author)
+        response = self.client.get(reverse(
+            'posts:profile', kwargs={'username': self.author.username}))
+        self.assertEqual(response.context['post_count'], 1)
+        self.assertContains(response, 'Всего постов: 1')
@@ -0,0 +1,22 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 does not speak ASGI itself, so the WSGI application is served
+through core.asgi.ThreadPoolASGIHandler: connections are handled by the
+ASGI server's event loop and views run in a bounded thread pool of
+ASGI_THREADS threads.
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import ThreadPoolASGIHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = ThreadPoolASGIHandler(
+    get_wsgi_application(), settings.ASGI_THREADS)
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -22,8 +24,12 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = '_72(xi-odbvgl6a*)hmm@w*nsrw3_u00@w*v-f-zs-6umth9+7'
 
+# Профиль запуска: YATUBE_PROFILE=production выключает DEBUG, включает
+# кэш скомпилированных шаблонов и постоянные соединения с БД
+PRODUCTION = os.getenv('YATUBE_PROFILE') == 'production'
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -42,7 +48,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'posts',
+    'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about',
@@ -50,6 +56,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,25 +68,44 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yatube.urls'
 DIR_TEMPLATE = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [DIR_TEMPLATE],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # debug отдает данные только при DEBUG и адресе из
+            # INTERNAL_IPS, поэтому в production не подключается
             'context_processors': [
-                'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'core.context_processors.year.year',
-            ],
+                'core.context_processors.globals.global_context',
+            ] + ([] if PRODUCTION else [
+                'django.template.context_processors.debug',
+            ]),
+            # в production шаблоны компилируются один раз на процесс;
+            # при разработке перечитываются, чтобы правки были видны
+            'loaders': (
+                [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+                if PRODUCTION else TEMPLATE_LOADERS
+            ),
         },
     },
 ]
+# Компилировать все шаблоны из DIR_TEMPLATE при старте процесса
+# (core.apps.CoreConfig.ready), а не первыми запросами пользователей
+TEMPLATE_WARMUP = PRODUCTION
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# потоков, в которых yatube/asgi.py выполняет view: столько запросов
+# одновременно работают с БД, остальные ждут в event loop
+ASGI_THREADS = 8
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -88,8 +114,24 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # в production соединение живет между запросами, а не
+        # открывается заново с чтением схемы на каждый запрос
+        'CONN_MAX_AGE': 600 if PRODUCTION else 0,
     }
 }
+# PRAGMA для каждого нового соединения с SQLite (core.db).
+# WAL: читатели не ждут пишущую транзакцию, а запись не ждет читателей;
+# synchronous=NORMAL в WAL не теряет целостность при сбое процесса.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 2 ** 20,
+    # отрицательное значение — в КиБ: 64 МиБ кэша страниц на соединение
+    'cache_size': -64 * 1024,
+    # сколько миллисекунд ждать чужую блокировку вместо ошибки
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
 
 
 # Password validation
@@ -142,9 +184,107 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
-CACHES = {
-    'default': {
+# загрузки больше этого Django пишет порциями во временный файл,
+# а не держит в памяти
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+
+# Картинки постов (posts.images): лимиты проверяются по заголовку
+# файла, а большие картинки уменьшаются и очищаются от метаданных
+POST_IMAGE_MAX_BYTES = 10 * 2 ** 20
+POST_IMAGE_MAX_PIXELS = 40 * 10 ** 6
+POST_IMAGE_MAX_SIDE = 1920
+POST_IMAGE_QUALITY = 85
+# перекодировать JPEG и PNG в WebP, если Pillow собран с libwebp
+POST_IMAGE_WEBP = False
+# файл картинки, сохраненный (или совпавший с новой загрузкой) за
+# столько секунд, не удаляется: пост со ссылкой на него еще может
+# быть не закоммичен
+POST_IMAGE_RELEASE_GRACE = 60 * 10
+
+# Бэкенд кэша выбирается переменной окружения YATUBE_CACHE:
+# locmem — свой кэш в каждом процессе, sqlite — общий файл для всех
+# воркеров (core.cache_backends.SQLiteCache). В production версии кэша
+# поднимают и воркеры gunicorn, и run_worker, поэтому кэш там общий.
+CACHE_PRESETS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.getenv(
+            'YATUBE_CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache', 'cache.sqlite3')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_SIZE': 256 * 2 ** 20,
+        },
+    },
+}
+CACHE_PRESET = os.getenv(
+    'YATUBE_CACHE', 'sqlite' if PRODUCTION else 'locmem')
+if PRODUCTION and CACHE_PRESET == 'locmem':
+    raise ImproperlyConfigured(
+        'YATUBE_CACHE=locmem: в production процессы не увидят версии '
+        'кэша друг друга'
+    )
+CACHES = {
+    'default': CACHE_PRESETS[CACHE_PRESET],
+}
+
+# Курсорная (keyset) пагинация лент вместо номеров страниц.
+# Включается и точечно, параметром ?cursor= в адресе.
+POSTS_CURSOR_PAGINATION = False
+# Сколько последних постов хранится в материализованной ленте подписок
+FEED_MAX_LENGTH = 1000
+# Полнотекстовый поиск через индекс FTS5, если база — SQLite;
+# иначе поиск идет через LIKE
+POSTS_SEARCH_FTS = True
+
+# Бюджеты SQL-запросов на view: {'posts:index': 5}. Дополняют
+# декоратор core.decorators.query_budget и имеют приоритет над ним.
+QUERY_BUDGETS = {}
+# Превышение бюджета — исключение (для тестов) или только warning в лог
+QUERY_BUDGET_STRICT = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.queries': {
+            'handlers': ['console'],
+            'level': os.getenv('QUERY_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
 }
+
+# TTL фрагментов лент: они сбрасываются версиями при изменениях постов
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Мягко удаленное вычищается фоновой задачей через PURGE_DELAY секунд,
+# по PURGE_JOB_BATCHES порций за задачу
+PURGE_DELAY = 60 * 60
+PURGE_JOB_BATCHES = 20
+
+# Очередь фоновых задач в БД (core.jobs), исполнители — run_worker.
+# Вне production задачи без задержки выполняются сразу при постановке,
+# чтобы разработка не требовала запущенного исполнителя.
+JOBS_IMMEDIATE = not PRODUCTION
+JOBS_POLL_INTERVAL = 1
+# задача, взятая исполнителем дольше этого, считается брошенной
+JOBS_TIMEOUT = 60 * 10
+
+# В production миниатюры создаются фоновыми задачами, а не при рендере
+# страницы; вне его рендер синхронный.
+THUMBNAIL_BACKEND = 'posts.thumbnails.AsyncThumbnailBackend'
+THUMBNAIL_ASYNC = PRODUCTION
+# Размеры, которые заранее создаются после сохранения картинки поста
+POST_THUMBNAIL_SIZES = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
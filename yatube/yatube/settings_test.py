@@ -0,0 +1,20 @@
+"""Настройки для тестов: manage.py test и pytest.
+
+Значения не зависят от YATUBE_PROFILE окружения, в котором запущены
+тесты.
+"""
+from .settings import *  # noqa: F401,F403
+
+# кэш в памяти процесса, а не общий файл production
+CACHES = {
+    'default': CACHE_PRESETS['locmem'],  # noqa: F405
+}
+
+# задачи выполняются при постановке: тесты не запускают исполнителя
+JOBS_IMMEDIATE = True
+# отложенная задача писала бы во временный MEDIA_ROOT, который тесты
+# удаляют
+THUMBNAIL_ASYNC = False
+
+# превышение бюджета запросов роняет тест, а не только пишется в лог
+QUERY_BUDGET_STRICT = True